@@ -0,0 +1,10 @@
+"""AMR genome dataset pipeline: ingest, encode, enrich and query the dataset.
+
+Every pipeline step is a module with a ``main(argv)`` that returns an exit
+status, so orchestration code can run steps in-process. The ``amr-dataset``
+command (see :mod:`amr_dataset.cli`) dispatches to them. Importing the
+package itself loads nothing else; pandas and numpy are only imported with
+the modules that use them.
+"""
+
+__version__ = '1.0.0'
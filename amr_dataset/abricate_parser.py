@@ -0,0 +1,168 @@
+"""Streaming parser for ABRicate reports.
+
+Reads reports line by line and keeps only the GENE and RESISTANCE fields of
+hits that pass the configured %COVERAGE / %IDENTITY / DATABASE thresholds, so
+rejected hits are never materialized and no DataFrame is built per file.
+Besides the flat gene and class lists, each profile keeps which gene each
+class came from (the gene -> class links used by resistance_index).
+
+Three report layouts are supported:
+
+- per-isolate reports (``abricate genome.fasta > genome.tsv``)
+- combined multi-sample reports (``abricate *.fasta > all.tab``), split into
+  isolates by the FILE column
+- ``abricate --summary`` tables, where each gene column holds the %COVERAGE
+  of its hits (or '.'); these carry no identity, database or resistance
+  information
+"""
+import os
+from collections import namedtuple
+
+# ABRicate report columns, in file order
+ABRICATE_COLUMNS = ['FILE', 'SEQUENCE', 'START', 'END', 'STRAND', 'GENE', 'COVERAGE', 'COVERAGE_MAP', 'GAPS', '%COVERAGE', '%IDENTITY', 'DATABASE', 'ACCESSION', 'PRODUCT', 'RESISTANCE']
+FILE_COL = ABRICATE_COLUMNS.index('FILE')
+GENE_COL = ABRICATE_COLUMNS.index('GENE')
+COVERAGE_COL = ABRICATE_COLUMNS.index('%COVERAGE')
+IDENTITY_COL = ABRICATE_COLUMNS.index('%IDENTITY')
+DATABASE_COL = ABRICATE_COLUMNS.index('DATABASE')
+RESISTANCE_COL = ABRICATE_COLUMNS.index('RESISTANCE')
+
+# Genome file extensions stripped from the FILE column to get the Isolate_ID
+GENOME_EXTENSIONS = ('.gz', '.fasta', '.fna', '.fa')
+
+# Minimum %COVERAGE / %IDENTITY and allowed databases (None = any) for a hit to count
+HitFilter = namedtuple('HitFilter', ['min_coverage', 'min_identity', 'databases'])
+NO_FILTER = HitFilter(0.0, 0.0, None)
+
+# One isolate's sorted, semicolon-separated gene and resistance lists, plus
+# its sorted ``[gene, class]`` links
+Profile = namedtuple('Profile', ['genes', 'resistances', 'links'])
+
+
+def isolate_id_from_file(file_field):
+    """Isolate_ID for an ABRicate FILE value, e.g. 'dir/AP039418.1.fasta' -> 'AP039418.1'."""
+    name = os.path.basename(file_field.strip())
+    for ext in GENOME_EXTENSIONS:
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    return name
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return float('nan')
+
+
+def _passes(fields, hit_filter):
+    if hit_filter.min_coverage and not _as_float(fields[COVERAGE_COL]) >= hit_filter.min_coverage:
+        return False
+    if hit_filter.min_identity and not _as_float(fields[IDENTITY_COL]) >= hit_filter.min_identity:
+        return False
+    if hit_filter.databases is not None and fields[DATABASE_COL] not in hit_filter.databases:
+        return False
+    return True
+
+
+def _iter_fields(handle):
+    """Field lists of the hit lines in a report, padded to the full column count."""
+    n_fields = len(ABRICATE_COLUMNS)
+    for line in handle:
+        if line.startswith('#') or not line.strip():
+            continue
+        fields = line.rstrip('\r\n').split('\t')
+        if len(fields) < n_fields:
+            fields += [''] * (n_fields - len(fields))
+        yield fields
+
+
+def iter_hits(handle, hit_filter=NO_FILTER):
+    """Yield ``(file, gene, resistance)`` for every accepted hit in a report.
+
+    Header/comment lines (starting with '#') and blank lines are skipped;
+    missing fields come back as empty strings.
+    """
+    for fields in _iter_fields(handle):
+        if hit_filter is NO_FILTER or _passes(fields, hit_filter):
+            yield fields[FILE_COL], fields[GENE_COL], fields[RESISTANCE_COL]
+
+
+class ProfileBuilder:
+    """Collects one isolate's hits into its gene and resistance profile strings."""
+
+    def __init__(self):
+        self.genes = set()
+        self.resistances = set()
+        self.links = set()
+
+    def add(self, gene, resistance):
+        if gene:
+            self.genes.add(gene)
+        if resistance:
+            classes = resistance.split(';')
+            self.resistances.update(classes)
+            if gene:
+                self.links.update((gene, cls) for cls in classes if cls)
+
+    def profile(self):
+        """The isolate's Profile: sorted, unique, semicolon-separated lists and sorted links."""
+        return Profile(';'.join(sorted(self.genes)), ';'.join(sorted(self.resistances)),
+                       [list(link) for link in sorted(self.links)])
+
+
+def parse_report(path, hit_filter=NO_FILTER):
+    """Profile of a single-isolate report."""
+    builder = ProfileBuilder()
+    with open(path) as handle:
+        for _, gene, resistance in iter_hits(handle, hit_filter):
+            builder.add(gene, resistance)
+    return builder.profile()
+
+
+def parse_combined_report(path, hit_filter=NO_FILTER):
+    """Profiles of every isolate in a combined multi-sample report.
+
+    Returns a dict of Isolate_ID -> Profile. Isolates whose
+    hits were all rejected get empty profiles; isolates with no hits at all
+    do not appear in an ABRicate report.
+    """
+    builders = {}
+    with open(path) as handle:
+        for fields in _iter_fields(handle):
+            file_field = fields[FILE_COL]
+            builder = builders.get(file_field)
+            if builder is None:
+                builder = builders[file_field] = ProfileBuilder()
+            if hit_filter is NO_FILTER or _passes(fields, hit_filter):
+                builder.add(fields[GENE_COL], fields[RESISTANCE_COL])
+    return {isolate_id_from_file(f): b.profile() for f, b in builders.items()}
+
+
+def parse_summary_report(path, min_coverage=0.0):
+    """Gene profiles from an ``abricate --summary`` table.
+
+    Returns a dict of Isolate_ID -> Profile with empty resistances and links;
+    summary tables carry no resistance classes. A gene counts if any of its hits reaches
+    ``min_coverage``.
+    """
+    profiles = {}
+    genes = None
+    with open(path) as handle:
+        for line in handle:
+            fields = line.rstrip('\r\n').split('\t')
+            if line.startswith('#'):
+                # '#FILE  NUM_FOUND  gene1  gene2 ...'
+                genes = fields[2:]
+                continue
+            if not line.strip() or genes is None:
+                continue
+            present = []
+            for gene, cell in zip(genes, fields[2:]):
+                if cell in ('', '.'):
+                    continue
+                if min_coverage and not any(_as_float(c) >= min_coverage for c in cell.split(';')):
+                    continue
+                present.append(gene)
+            profiles[isolate_id_from_file(fields[0])] = Profile(';'.join(sorted(set(present))), '', [])
+    return profiles
@@ -0,0 +1,148 @@
+"""Shared one-hot (multi-hot) encoder for semicolon-separated AMR profiles.
+
+``AMR_Gene_Profile`` and ``Drug_Resistance_Phenotype`` hold lists such as
+``"acrB;tet(A)"``. Instead of ``str.get_dummies``, which builds a dense int64
+matrix by testing every row against every vocabulary entry, the encoder
+splits each list once and turns the hits into CSR coordinates, so the work
+scales with the number of hits. The result can be expanded into a compact
+uint8/bool DataFrame or exported directly as a sparse matrix for ML tools.
+"""
+from collections import namedtuple
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# Sparse presence matrix: row i has ones at columns indices[indptr[i]:indptr[i + 1]]
+CsrMatrix = namedtuple('CsrMatrix', ['indptr', 'indices', 'columns'])
+
+
+def _split_lists(series, sep):
+    """Return ``(row_positions, tokens)`` for every non-empty list item."""
+    lists = series.fillna('').astype(str).str.split(sep)
+    lengths = lists.str.len().to_numpy(dtype=np.int64)
+    rows = np.repeat(np.arange(len(lists), dtype=np.int64), lengths)
+    tokens = np.fromiter(chain.from_iterable(lists), dtype=object, count=int(lengths.sum()))
+    keep = tokens != ''
+    return rows[keep], tokens[keep]
+
+
+def count_items(series, sep=';'):
+    """Number of rows containing each distinct item of a column of ``sep``-separated lists."""
+    rows, tokens = _split_lists(series, sep)
+    codes, uniques = pd.factorize(tokens)
+    if not len(uniques):
+        return {}
+    # Repeated items count once per row
+    pairs = np.unique(rows * len(uniques) + codes)
+    counts = np.bincount(pairs % len(uniques), minlength=len(uniques))
+    return dict(zip(uniques.tolist(), counts.tolist()))
+
+
+def encode_lists(series, sep=';', vocabulary=None):
+    """Encode a column of ``sep``-separated lists as a CsrMatrix.
+
+    Columns follow ``vocabulary`` (default: the sorted distinct items, the
+    same order ``str.get_dummies`` uses). Items missing from a given
+    vocabulary are ignored and repeated items count once per row.
+    """
+    rows, tokens = _split_lists(series, sep)
+    if vocabulary is None:
+        vocabulary = sorted(set(tokens))
+    codes = pd.Categorical(tokens, categories=vocabulary).codes.astype(np.int64)
+    known = codes >= 0
+    rows, codes = rows[known], codes[known]
+
+    # Sort by (row, column) and drop duplicate hits
+    n_cols = max(len(vocabulary), 1)
+    keys = np.unique(rows * n_cols + codes)
+    rows, indices = np.divmod(keys, n_cols)
+    indptr = np.zeros(len(series) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(series)), out=indptr[1:])
+    return CsrMatrix(indptr, indices.astype(np.int32), list(vocabulary))
+
+
+def add_prefix(matrix, prefix):
+    """Return ``matrix`` with ``prefix`` prepended to every column name."""
+    return matrix._replace(columns=[prefix + c for c in matrix.columns])
+
+
+def hstack_csr(*matrices):
+    """Join CsrMatrix blocks with the same rows side by side."""
+    n_rows = len(matrices[0].indptr) - 1
+    rows = []
+    indices = []
+    columns = []
+    for matrix in matrices:
+        rows.append(np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(matrix.indptr)))
+        indices.append(matrix.indices.astype(np.int64) + len(columns))
+        columns.extend(matrix.columns)
+    rows = np.concatenate(rows)
+    indices = np.concatenate(indices)
+    order = np.lexsort((indices, rows))
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return CsrMatrix(indptr, indices[order].astype(np.int32), columns)
+
+
+def vstack_csr(*matrices):
+    """Stack CsrMatrix blocks with the same columns on top of each other."""
+    columns = matrices[0].columns
+    if any(matrix.columns != columns for matrix in matrices[1:]):
+        raise ValueError("vstack_csr needs blocks with the same columns")
+    offsets = np.cumsum([0] + [len(matrix.indices) for matrix in matrices])
+    indptr = np.concatenate([matrix.indptr[:-1] + offset for matrix, offset in zip(matrices, offsets)]
+                            + [offsets[-1:]])
+    indices = np.concatenate([matrix.indices for matrix in matrices])
+    return CsrMatrix(indptr.astype(np.int64), indices.astype(np.int32), columns)
+
+
+def to_frame(matrix, prefix='', index=None, dtype='uint8'):
+    """Expand a CsrMatrix into a presence/absence DataFrame.
+
+    ``dtype`` is ``'uint8'`` (default; written as 0/1 like the old int64
+    dummies), ``'bool'`` or ``'sparse'`` (pandas SparseDtype, requires scipy).
+    """
+    n_rows = len(matrix.indptr) - 1
+    columns = [prefix + c for c in matrix.columns]
+    if dtype == 'sparse':
+        try:
+            from scipy import sparse
+        except ImportError:
+            raise ImportError("dtype='sparse' requires scipy (pip install scipy)")
+        data = np.ones(len(matrix.indices), dtype=np.uint8)
+        spmatrix = sparse.csr_matrix((data, matrix.indices, matrix.indptr), shape=(n_rows, len(columns)))
+        return pd.DataFrame.sparse.from_spmatrix(spmatrix, index=index, columns=columns)
+
+    dense = np.zeros((n_rows, len(columns)), dtype=dtype)
+    rows = np.repeat(np.arange(n_rows), np.diff(matrix.indptr))
+    dense[rows, matrix.indices] = 1
+    return pd.DataFrame(dense, index=index, columns=columns)
+
+
+def save_csr(path, matrix, row_ids=None):
+    """Save a CsrMatrix as a ``.npz`` readable by ``scipy.sparse.load_npz``.
+
+    Column names (and optional row IDs) are stored alongside the matrix
+    under the ``columns`` and ``row_ids`` keys.
+    """
+    n_rows = len(matrix.indptr) - 1
+    arrays = {
+        'format': np.array(b'csr'),
+        'shape': np.array([n_rows, len(matrix.columns)]),
+        'data': np.ones(len(matrix.indices), dtype=np.uint8),
+        'indices': matrix.indices,
+        'indptr': matrix.indptr,
+        'columns': np.array(matrix.columns, dtype=str),
+    }
+    if row_ids is not None:
+        arrays['row_ids'] = np.array(list(row_ids), dtype=str)
+    np.savez_compressed(path, **arrays)
+
+
+def load_csr(path):
+    """Load a CsrMatrix (and row IDs, or None) written by :func:`save_csr`."""
+    with np.load(path) as npz:
+        matrix = CsrMatrix(npz['indptr'], npz['indices'], npz['columns'].tolist())
+        row_ids = npz['row_ids'].tolist() if 'row_ids' in npz else None
+    return matrix, row_ids
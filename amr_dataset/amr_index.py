@@ -0,0 +1,157 @@
+"""On-disk SQLite index of isolates and their AMR genes / resistance classes.
+
+Built from the summary dataset as a side output of the pipeline, the index
+answers point lookups ("genes of AP039418.1") and reverse lookups ("isolates
+carrying CTX-M-15 and MCR-1") with indexed queries instead of loading the
+dataset. Tables:
+
+- ``isolates``: one row per isolate (ID, genome length, GC content)
+- ``features``: the gene and class vocabularies (``kind`` is 'gene' or 'class')
+- ``isolate_features``: presence pairs, keyed both ways for forward and
+  inverted lookups
+
+Query helpers only need the standard library; pandas is imported when
+building.
+
+Build usage:
+    amr-dataset index --input amr_summary_dataset.csv --output amr_index.sqlite
+"""
+import argparse
+import os
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE isolates (
+    isolate_pk INTEGER PRIMARY KEY,
+    isolate_id TEXT NOT NULL UNIQUE,
+    genome_length INTEGER,
+    gc_content REAL
+);
+CREATE TABLE features (
+    feature_pk INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (kind, name)
+);
+CREATE TABLE isolate_features (
+    isolate_pk INTEGER NOT NULL,
+    feature_pk INTEGER NOT NULL,
+    PRIMARY KEY (isolate_pk, feature_pk)
+) WITHOUT ROWID;
+CREATE INDEX isolate_features_by_feature ON isolate_features (feature_pk, isolate_pk);
+"""
+
+# Summary dataset column holding each feature kind's semicolon-separated list
+FEATURE_COLUMNS = {'gene': 'AMR_Gene_Profile', 'class': 'Drug_Resistance_Phenotype'}
+
+
+def build_index(summary_df, db_path):
+    """Write the index for a summary dataset to ``db_path`` (replacing it)."""
+    import numpy as np
+    import pandas as pd
+
+    from .amr_encoding import encode_lists
+
+    tmp_path = db_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        lengths = pd.to_numeric(summary_df['Genome_Length_BP'], errors='coerce').astype('Int64')
+        # Via text, so float32 values are stored as written (50.86, not 50.8600006)
+        gc = pd.to_numeric(summary_df['GC_Content_Percent'].astype(str), errors='coerce')
+        conn.executemany(
+            "INSERT INTO isolates VALUES (?, ?, ?, ?)",
+            ((i, isolate_id, None if pd.isna(length) else int(length), None if pd.isna(g) else float(g))
+             for i, (isolate_id, length, g) in enumerate(zip(summary_df['Isolate_ID'], lengths, gc))))
+
+        offset = 0
+        for kind, column in FEATURE_COLUMNS.items():
+            matrix = encode_lists(summary_df[column])
+            conn.executemany("INSERT INTO features VALUES (?, ?, ?)",
+                             ((offset + j, kind, name) for j, name in enumerate(matrix.columns)))
+            rows = np.repeat(np.arange(len(summary_df)), np.diff(matrix.indptr))
+            pairs = zip(rows.tolist(), (matrix.indices.astype(np.int64) + offset).tolist())
+            conn.executemany("INSERT INTO isolate_features VALUES (?, ?)", pairs)
+            offset += len(matrix.columns)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+
+
+def connect(db_path):
+    """Open an existing index read-only."""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def get_isolate(conn, isolate_id):
+    """``(isolate_id, genome_length, gc_content)`` for an isolate, or None."""
+    return conn.execute("SELECT isolate_id, genome_length, gc_content FROM isolates WHERE isolate_id = ?",
+                        (isolate_id,)).fetchone()
+
+
+def isolate_features(conn, isolate_id, kind='gene'):
+    """Sorted gene (or class) names present in an isolate."""
+    rows = conn.execute(
+        """SELECT f.name FROM isolates i
+           JOIN isolate_features x ON x.isolate_pk = i.isolate_pk
+           JOIN features f ON f.feature_pk = x.feature_pk
+           WHERE i.isolate_id = ? AND f.kind = ?
+           ORDER BY f.name""", (isolate_id, kind))
+    return [name for name, in rows]
+
+
+def has_features(conn, isolate_id, names, kind='gene'):
+    """Map each name to whether the isolate carries it."""
+    present = set(isolate_features(conn, isolate_id, kind))
+    return {name: name in present for name in names}
+
+
+def isolates_with(conn, names, kind='gene', require_all=True):
+    """Isolates carrying all (or, with ``require_all=False``, any) of ``names``."""
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+    placeholders = ', '.join('?' * len(names))
+    having = f"HAVING COUNT(*) = {len(names)}" if require_all else ""
+    rows = conn.execute(
+        f"""SELECT i.isolate_id FROM features f
+            JOIN isolate_features x ON x.feature_pk = f.feature_pk
+            JOIN isolates i ON i.isolate_pk = x.isolate_pk
+            WHERE f.kind = ? AND f.name IN ({placeholders})
+            GROUP BY i.isolate_pk {having}
+            ORDER BY i.isolate_id""", [kind] + names)
+    return [isolate_id for isolate_id, in rows]
+
+
+def known_features(conn, names, kind='gene'):
+    """The subset of ``names`` that appear anywhere in the index."""
+    placeholders = ', '.join('?' * len(names))
+    rows = conn.execute(f"SELECT name FROM features WHERE kind = ? AND name IN ({placeholders})", [kind] + list(names))
+    return {name for name, in rows}
+
+
+def counts(conn):
+    """Number of isolates, genes and classes in the index."""
+    n_isolates = conn.execute("SELECT COUNT(*) FROM isolates").fetchone()[0]
+    per_kind = dict(conn.execute("SELECT kind, COUNT(*) FROM features GROUP BY kind"))
+    return {'isolates': n_isolates, 'genes': per_kind.get('gene', 0), 'classes': per_kind.get('class', 0)}
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Build the SQLite isolate/gene lookup index from the summary dataset.")
+    parser.add_argument('--input', default='amr_summary_dataset.csv', help="Summary dataset with gene lists")
+    parser.add_argument('--output', default='amr_index.sqlite', help="SQLite index to write")
+    args = parser.parse_args(argv)
+
+    from .amr_io import read_table
+    from .amr_schema import SUMMARY_COLUMNS
+
+    summary_df = read_table(args.input, required=SUMMARY_COLUMNS)
+    build_index(summary_df, args.output)
+    print(f"Indexed {len(summary_df)} isolates into {args.output}")
+    return 0
@@ -0,0 +1,212 @@
+"""Pluggable table storage for the pipeline stages.
+
+Every stage reads and writes its tables through :func:`read_table` and
+:func:`write_table`, which pick the format from the file extension:
+
+- ``.csv`` (optionally ``.gz``/``.bz2``/``.xz``/``.zst`` compressed) - plain
+  text, kept for the Kaggle release and anything that wants a spreadsheet.
+- ``.parquet`` - columnar, compressed, supports reading a subset of columns.
+- ``.feather`` / ``.arrow`` - Arrow IPC, fastest to load back.
+
+:func:`iter_table` and :class:`TableWriter` do the same in row chunks for
+stages that must not hold a whole table in memory.
+
+CSV output goes through :class:`csv_writer.CsvWriter`, which writes the same
+bytes as ``to_csv(index=False)`` with a fast path for the 0/1 flag columns
+and, given ``workers``, formats row blocks in parallel processes.
+
+Loaded tables are cast to the dataset schema (see amr_schema) and checked
+against it. Columnar files are written with typed schemas: gene/class
+presence flags as bool and low-cardinality metadata as categorical. CSV
+output always writes flags as 0/1, so a Parquet stage can feed a CSV export
+unchanged. Parquet and Arrow support needs ``pyarrow``.
+"""
+import csv
+import os
+
+import pandas as pd
+
+from .amr_schema import (CATEGORICAL_COLUMNS, NON_FEATURE_COLUMNS, SchemaError, apply_schema, csv_dtypes,
+                        is_flag_column, require_columns)
+from .csv_writer import CsvWriter
+
+COLUMNAR_EXTENSIONS = {'.parquet': 'parquet', '.feather': 'feather', '.arrow': 'feather'}
+COMPRESSED_EXTENSIONS = ('.gz', '.bz2', '.xz', '.zst', '.zip')
+
+
+def table_format(path):
+    """Return ``'csv'``, ``'parquet'`` or ``'feather'`` for a file path."""
+    ext = os.path.splitext(path)[1].lower()
+    return COLUMNAR_EXTENSIONS.get(ext, 'csv')
+
+
+def to_typed(df):
+    """Cast flags to bool and low-cardinality metadata to category."""
+    typed = {}
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS and pd.api.types.is_string_dtype(df[col].dtype):
+            typed[col] = df[col].astype('category')
+        elif is_flag_column(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            typed[col] = df[col].astype(bool)
+    return df.assign(**typed) if typed else df
+
+
+def to_plain(df):
+    """Cast bool flags back to uint8 so CSV output keeps its 0/1 text."""
+    flags = {col: df[col].astype('uint8') for col in df.columns if pd.api.types.is_bool_dtype(df[col])}
+    return df.assign(**flags) if flags else df
+
+
+def read_columns(path):
+    """Column names of a table without loading its rows."""
+    fmt = table_format(path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    if fmt == 'feather':
+        import pyarrow.ipc as ipc
+        with ipc.open_file(path) as reader:
+            return reader.schema.names
+    if os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS:
+        return list(pd.read_csv(path, nrows=0).columns)
+    with open(path, newline='') as handle:
+        return next(csv.reader(handle), [])
+
+
+def _csv_options(path, columns, kwargs):
+    """read_csv keyword arguments with schema dtypes; returns ``(options, caller_typed_columns)``.
+
+    A ``dtype`` mapping passed by the caller overrides the schema for its
+    columns; any other ``dtype`` value disables the schema.
+    """
+    options = dict(kwargs)
+    dtype = options.pop('dtype', None)
+    if dtype is not None and not isinstance(dtype, dict):
+        return dict(kwargs), None
+    dtypes = csv_dtypes(columns if columns is not None else read_columns(path))
+    dtypes.update(dtype or {})
+    options['dtype'] = dtypes
+    return options, set(dtype or ())
+
+
+def _read_csv(path, **options):
+    try:
+        return pd.read_csv(path, **options)
+    except (TypeError, ValueError) as e:
+        # e.g. a blank or non-numeric presence flag
+        raise SchemaError(f"{path}: {e}") from e
+
+
+def read_table(path, columns=None, required=None, **kwargs):
+    """Load a table, optionally only the listed ``columns``, cast to the dataset schema.
+
+    ``required`` lists columns the file must have (SchemaError otherwise).
+    Extra keyword arguments are passed to the underlying pandas reader.
+    """
+    if required:
+        require_columns(read_columns(path), required, path)
+    fmt = table_format(path)
+    if fmt == 'parquet':
+        return apply_schema(pd.read_parquet(path, columns=columns, **kwargs), path)
+    if fmt == 'feather':
+        return apply_schema(pd.read_feather(path, columns=columns, **kwargs), path)
+    options, skip = _csv_options(path, columns, kwargs)
+    df = _read_csv(path, usecols=columns, **options)
+    if skip is not None:
+        df = apply_schema(df, path, skip)
+    # usecols does not preserve the requested order
+    return df[columns] if columns is not None else df
+
+
+def iter_table(path, columns=None, chunksize=100_000, **kwargs):
+    """Yield a table as DataFrames of at most ``chunksize`` rows, cast to the dataset schema.
+
+    Extra keyword arguments are passed to ``pd.read_csv`` for CSV inputs.
+    """
+    fmt = table_format(path)
+    if fmt == 'csv':
+        options, skip = _csv_options(path, columns, kwargs)
+        try:
+            for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize, **options):
+                if skip is not None:
+                    chunk = apply_schema(chunk, path, skip)
+                yield chunk[columns] if columns is not None else chunk
+        except SchemaError:
+            raise
+        except (TypeError, ValueError) as e:
+            raise SchemaError(f"{path}: {e}") from e
+        return
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+    else:
+        import pyarrow as pa
+        # Memory-mapped, so record batches are only paged in when converted
+        reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        if columns is not None and fmt == 'feather':
+            batch = batch.select(columns)
+        for start in range(0, batch.num_rows, chunksize):
+            yield apply_schema(batch.slice(start, chunksize).to_pandas(), path)
+
+
+class TableWriter:
+    """Append DataFrame chunks to one output table (CSV, Parquet or Feather).
+
+    Use as a context manager; the header/schema comes from the first chunk.
+    ``workers`` is the number of processes formatting CSV output.
+    """
+
+    def __init__(self, path, compression=None, workers=1):
+        self.path = path
+        self.fmt = table_format(path)
+        self.compression = compression
+        self._writer = CsvWriter(path, workers=workers) if self.fmt == 'csv' else None
+        self._schema = None
+
+    def write(self, chunk):
+        if self.fmt == 'csv':
+            self._writer.write(to_plain(chunk))
+            return
+
+        import pyarrow as pa
+        table = pa.Table.from_pandas(to_typed(chunk), schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.fmt == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.path, self._schema, compression=self.compression or 'zstd')
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=self.compression or 'lz4')
+                self._writer = pa.ipc.new_file(self.path, self._schema, options=options)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_table(df, path, compression=None, workers=1):
+    """Save a table in the format implied by ``path``.
+
+    ``compression`` overrides the codec for columnar formats (default zstd
+    for Parquet, lz4 for Feather); CSV compression follows the extension.
+    ``workers`` processes format CSV output in row blocks.
+    """
+    fmt = table_format(path)
+    if fmt == 'parquet':
+        to_typed(df).to_parquet(path, index=False, compression=compression or 'zstd')
+    elif fmt == 'feather':
+        to_typed(df).reset_index(drop=True).to_feather(path, compression=compression or 'lz4')
+    else:
+        with CsvWriter(path, workers=workers) as writer:
+            writer.write(to_plain(df))
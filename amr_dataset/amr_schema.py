@@ -0,0 +1,157 @@
+"""Column schema of the AMR dataset tables.
+
+All loaders in amr_io apply this schema, so every stage works on compact
+dtypes instead of pandas' inferred int64/float64/object columns:
+
+- gene/class presence flags (``gene_``/``class_`` columns, and the unprefixed
+  0/1 columns of amr_summary_cleaned.csv): uint8 (bool in Parquet/Feather)
+- ``Genome_Length_BP`` and the assembly counts (contigs, largest contig,
+  N50, L50): nullable Int64; ``GC_Content_Percent``, the ambiguous-base
+  fraction and per-contig GC spread: float32
+- low-cardinality metadata (organism, country, host, ...): category
+
+Values are checked against the schema on load. A table that breaks it
+(flags other than 0/1, negative lengths or counts, GC outside 0-100,
+fractions outside 0-1, missing required columns) raises SchemaError naming the file and columns.
+"""
+import numpy as np
+import pandas as pd
+
+# Prefixes of one-hot presence/absence columns
+FLAG_PREFIXES = ('gene_', 'class_')
+
+# Metadata columns with few distinct values, stored as categoricals
+CATEGORICAL_COLUMNS = [
+    'organism', 'country', 'host', 'isolation_source', 'assembly_level',
+    'collection_season', 'host_standardized', 'isolation_source_standardized',
+]
+
+# Non-feature columns of the per-isolate tables
+BASE_COLUMNS = ['Isolate_ID', 'Genome_Length_BP', 'GC_Content_Percent']
+
+# Assembly quality statistics from the genome scan (see genome_stats.assembly_stats);
+# optional, summaries written before they existed do not have them
+ASSEMBLY_COUNT_COLUMNS = ['Contig_Count', 'Largest_Contig_BP', 'N50_BP', 'L50']
+ASSEMBLY_COLUMNS = ASSEMBLY_COUNT_COLUMNS + ['Ambiguous_Base_Fraction', 'Contig_GC_SD']
+
+# Per-isolate columns that are never presence/absence features
+NON_FEATURE_COLUMNS = BASE_COLUMNS + ASSEMBLY_COLUMNS
+
+# Required columns of the ingest output (amr_summary_dataset.csv); the ingest
+# writes the assembly columns after GC_Content_Percent
+SUMMARY_COLUMNS = BASE_COLUMNS + ['AMR_Gene_Profile', 'Drug_Resistance_Phenotype']
+
+# Fixed dtypes of known columns
+COLUMN_DTYPES = {
+    'Genome_Length_BP': 'Int64',
+    'GC_Content_Percent': 'float32',
+    **{col: 'Int64' for col in ASSEMBLY_COUNT_COLUMNS},
+    'Ambiguous_Base_Fraction': 'float32',
+    'Contig_GC_SD': 'float32',
+    'total_amr_genes': 'int32',
+    'total_resistance_classes': 'int32',
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+}
+
+FLAG_DTYPE = np.dtype('uint8')
+
+
+class SchemaError(ValueError):
+    """A table does not match the dataset schema."""
+
+
+def is_flag_name(column):
+    return str(column).startswith(FLAG_PREFIXES)
+
+
+def csv_dtypes(columns):
+    """``dtype`` mapping for ``pd.read_csv`` given a file's column names."""
+    dtypes = {}
+    for col in columns:
+        if col in COLUMN_DTYPES:
+            dtypes[col] = COLUMN_DTYPES[col]
+        elif is_flag_name(col):
+            dtypes[col] = FLAG_DTYPE
+    return dtypes
+
+
+def is_flag_column(series):
+    """True for presence/absence columns: bool, or integers that are all 0/1."""
+    if pd.api.types.is_bool_dtype(series):
+        return True
+    if series.name is not None and is_flag_name(series.name):
+        return pd.api.types.is_integer_dtype(series)
+    if not pd.api.types.is_integer_dtype(series) or series.name in COLUMN_DTYPES or series.name in NON_FEATURE_COLUMNS:
+        return False
+    return bool(series.isin([0, 1]).all())
+
+
+def _check(df, source, skip=()):
+    """Raise SchemaError if values break the schema."""
+    problems = []
+    # Prefixed flags are parsed straight to uint8, so out-of-range values show up as > 1
+    flags = [col for col in df.columns
+             if col not in skip and is_flag_name(col) and pd.api.types.is_integer_dtype(df[col])]
+    if flags:
+        bad = [col for col, top in df[flags].max().items() if top > 1]
+        if bad:
+            problems.append(f"presence flags must be 0/1: {', '.join(map(str, bad[:10]))}")
+    for col in ['Genome_Length_BP'] + ASSEMBLY_COUNT_COLUMNS:
+        if col in df and col not in skip and (df[col] < 0).any():
+            problems.append(f"{col} has negative values")
+    if ('GC_Content_Percent' in df and 'GC_Content_Percent' not in skip
+            and not df['GC_Content_Percent'].dropna().between(0, 100).all()):
+        problems.append("GC_Content_Percent is outside 0-100")
+    if ('Ambiguous_Base_Fraction' in df and 'Ambiguous_Base_Fraction' not in skip
+            and not df['Ambiguous_Base_Fraction'].dropna().between(0, 1).all()):
+        problems.append("Ambiguous_Base_Fraction is outside 0-1")
+    if problems:
+        raise SchemaError(f"{source}: " + '; '.join(problems))
+
+
+def apply_schema(df, source='table', skip=()):
+    """Cast a loaded table to the schema dtypes and check its values.
+
+    Flags that are already bool (Parquet/Feather) stay bool; integer flags
+    become uint8. Columns the schema does not know, and those in ``skip``
+    (read with a caller-chosen dtype), are left as loaded.
+    """
+    typed = {}
+    candidates = []
+    for col, current in df.dtypes.items():
+        if col in skip:
+            continue
+        dtype = COLUMN_DTYPES.get(col)
+        try:
+            if dtype == 'category':
+                if not isinstance(current, pd.CategoricalDtype):
+                    typed[col] = df[col].astype('category')
+            elif dtype is not None:
+                if current != dtype:
+                    typed[col] = pd.to_numeric(df[col]).astype(dtype)
+            elif current != FLAG_DTYPE and current.kind in 'iu' and col not in NON_FEATURE_COLUMNS:
+                candidates.append(col)
+        except (TypeError, ValueError) as e:
+            raise SchemaError(f"{source}: column {col!r} does not fit {dtype}: {e}") from e
+
+    # Integer columns holding only 0/1 are flags; checked as one block
+    if candidates:
+        values = df[candidates].to_numpy()
+        is_flag = ((values == 0) | (values == 1)).all(axis=0)
+        bad = [col for col, flag in zip(candidates, is_flag) if not flag and is_flag_name(col)]
+        if bad:
+            raise SchemaError(f"{source}: presence flags must be 0/1: {', '.join(map(str, bad[:10]))}")
+        flags = [col for col, flag in zip(candidates, is_flag) if flag]
+        if flags:
+            typed.update(df[flags].astype(FLAG_DTYPE).items())
+    if typed:
+        df = df.assign(**typed)
+    _check(df, source, skip)
+    return df
+
+
+def require_columns(columns, required, source='table'):
+    """Raise SchemaError if any of ``required`` is missing from ``columns``."""
+    missing = [col for col in required if col not in set(columns)]
+    if missing:
+        raise SchemaError(f"{source}: missing required column(s): {', '.join(missing)}")
@@ -0,0 +1,274 @@
+"""Master dataset with sample metadata and engineered features (``amr-dataset build``)."""
+import argparse
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .amr_encoding import add_prefix, count_items, encode_lists, hstack_csr, save_csr, to_frame, vstack_csr
+from .amr_io import TableWriter, iter_table, read_columns, read_table, write_table
+from .amr_schema import SUMMARY_COLUMNS, require_columns
+from .instrumentation import RunReport, add_report_arguments
+from .metadata_join import (METADATA_CHUNK_ROWS, attach, index_source, normalize_accessions, read_metadata,
+                           unify_join_dtypes)
+from .metadata_features import add_date_features, standardize_host, standardize_isolation_source
+
+# Metadata columns to keep
+epi_cols_to_keep = ['collection_date', 'country', 'host', 'isolation_source']
+# Get the full list of columns from the image
+pub_cols_to_keep = [
+    'assembly_level', 'ref_authors',
+    'ref_title', 'ref_journal', 'ref_pubmed', 'organism',
+    'biosample', 'bioproject', 'taxonomy'
+]
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Build the final one-hot AMR master dataset with metadata and engineered features.")
+    parser.add_argument('--input', default='../data/processed/amr_summary_dataset.csv', help="Summary dataset with gene lists")
+    parser.add_argument('--pub-metadata', default='../data/raw/NCBI Metadata Run/metadata_3ebce10c-02d3-448b-a224-4290ec9583cd.csv', help="NCBI publication metadata export")
+    parser.add_argument('--output', default='../data/processed/Kaggle_AMR_Dataset_v1.0_final.csv', help="Master dataset (.csv for the Kaggle release, or .parquet/.feather)")
+    parser.add_argument('--chunksize', type=int, help="Build out of core, this many isolates at a time (two passes over --input)")
+    parser.add_argument('--metadata-chunksize', type=int, default=METADATA_CHUNK_ROWS, help="Metadata rows read at a time")
+    parser.add_argument('--workers', type=int, default=1, help="Processes formatting CSV output in row blocks (default: 1)")
+    parser.add_argument('--sparse-output', help="Also save the gene_/class_ matrix as a sparse .npz (scipy CSR)")
+    add_report_arguments(parser)
+    return parser
+
+
+# The steps below work on a block of isolates: the whole table in the default
+# build, or one chunk at a time with --chunksize. Both give the same columns.
+
+def load_metadata_sources(args, isolate_ids, accession_keys):
+    """Load the metadata for our isolates and index each source by normalized accession.
+
+    Returns ``(sources, pub_rows_scanned, pub_rows_kept)``.
+    """
+    # Source 2: The epidemiological metadata (old file) - the file doesn't exist yet, so
+    # this placeholder only provides its columns, with no values
+    epi_meta_df = pd.DataFrame({
+        'accession': isolate_ids,
+        **{col: [None] * len(isolate_ids) for col in epi_cols_to_keep}
+    })
+
+    # Source 3: The new publication metadata - only the columns we keep, streamed in
+    # chunks, and only the rows for our isolates
+    pub_meta_df, pub_rows_scanned = read_metadata(args.pub_metadata, 'accession', pub_cols_to_keep,
+                                                  accession_keys, chunksize=args.metadata_chunksize)
+
+    # Duplicate accessions are reported and their first row kept
+    sources = [
+        index_source(epi_meta_df, 'accession', epi_cols_to_keep, 'epi_metadata'),
+        index_source(pub_meta_df, 'accession', pub_cols_to_keep, 'pub_metadata'),
+    ]
+    return sources, pub_rows_scanned, len(pub_meta_df)
+
+
+def encode_profiles(amr_lists_df, gene_vocabulary=None, class_vocabulary=None):
+    """One-hot encode the gene and class lists; returns ``(amr_core_df, gene_matrix, class_matrix)``.
+
+    Columns follow the given vocabularies (default: the items in this block).
+    """
+    # Missing profiles are encoded as no genes/classes
+    gene_matrix = add_prefix(encode_lists(amr_lists_df['AMR_Gene_Profile'], vocabulary=gene_vocabulary), 'gene_')
+    class_matrix = add_prefix(encode_lists(amr_lists_df['Drug_Resistance_Phenotype'], vocabulary=class_vocabulary), 'class_')
+    gene_dummies = to_frame(gene_matrix, index=amr_lists_df.index)
+    class_dummies = to_frame(class_matrix, index=amr_lists_df.index)
+
+    # Get the base info (Isolate_ID, Genome_Length, GC_Content)
+    base_info_df = amr_lists_df[['Isolate_ID', 'Genome_Length_BP', 'GC_Content_Percent']]
+
+    # Create the core AMR dataset
+    amr_core_df = base_info_df.join(gene_dummies).join(class_dummies)
+    return amr_core_df, gene_matrix, class_matrix
+
+
+def engineer_features(final_dataset):
+    """Add the date and standardized host/isolation source columns in place."""
+    # Date Engineering: Parse collection_date (each distinct value once) and extract
+    # collection_year, collection_month and collection_season
+    add_date_features(final_dataset)
+    # Nullable integers, so a block with no missing dates is written like any other
+    final_dataset['collection_year'] = final_dataset['collection_year'].astype('Int64')
+    final_dataset['collection_month'] = final_dataset['collection_month'].astype('Int64')
+
+    # Categorical Standardization for host and isolation_source
+    # (keyword rules live in standardization_rules.json)
+    final_dataset['host_standardized'] = standardize_host(final_dataset['host'])
+    final_dataset['isolation_source_standardized'] = standardize_isolation_source(final_dataset['isolation_source'])
+
+
+def add_summary_counts(final_dataset, gene_matrix, class_matrix):
+    """Add total_amr_genes and total_resistance_classes, the hits per row of each matrix."""
+    final_dataset['total_amr_genes'] = np.diff(gene_matrix.indptr).astype(np.int32)
+    final_dataset['total_resistance_classes'] = np.diff(class_matrix.indptr).astype(np.int32)
+
+
+def move_isolate_id_first(final_dataset):
+    # Move Isolate_ID to the front for clarity
+    isolate_col = final_dataset.pop('Isolate_ID')
+    final_dataset.insert(0, 'Isolate_ID', isolate_col)
+    return final_dataset
+
+
+def build_in_memory(args, report, output_filename):
+    """Build the master dataset with the whole table in memory; returns its shape."""
+    # --- 1. Load all three source files ---
+    print("Loading data sources...")
+    with report.stage('load') as stage:
+        # Source 1: The intermediate file with gene lists
+        amr_lists_df = read_table(args.input, required=SUMMARY_COLUMNS)
+
+        # Normalize every accession once: strip the version and treat GCA_/GCF_ alike,
+        # e.g. "AP039418.1" becomes "AP039418"
+        accession_keys = normalize_accessions(amr_lists_df['Isolate_ID'])
+
+        sources, pub_rows_scanned, pub_rows_kept = load_metadata_sources(args, amr_lists_df['Isolate_ID'], accession_keys)
+        stage.output(amr_lists_df)
+        stage.count(pub_metadata_rows=pub_rows_scanned, pub_metadata_rows_kept=pub_rows_kept)
+
+    # --- 2. Perform One-Hot Encoding with Prefixes ---
+    print("Performing one-hot encoding with prefixes...")
+    with report.stage('encode') as stage:
+        stage.input(amr_lists_df)
+        amr_core_df, gene_matrix, class_matrix = encode_profiles(amr_lists_df)
+
+        if args.sparse_output:
+            save_csr(args.sparse_output, hstack_csr(gene_matrix, class_matrix), row_ids=amr_lists_df['Isolate_ID'])
+            print(f"Sparse feature matrix saved to {args.sparse_output}")
+        stage.output(amr_core_df)
+        stage.count(genes=len(gene_matrix.columns), classes=len(class_matrix.columns),
+                    gene_hits=len(gene_matrix.indices), class_hits=len(class_matrix.indices))
+
+    # --- 3. Perform the Three-Way Merge ---
+    print("Merging all three data sources...")
+    # Left-join the narrow metadata blocks onto the wide AMR core without copying it
+    with report.stage('join_metadata') as stage:
+        final_dataset, join_stats = attach(amr_core_df, accession_keys, sources)
+        stage.merges(join_stats)
+        stage.output(final_dataset)
+
+    # --- 4. Advanced Feature Engineering ---
+    print("Performing advanced feature engineering...")
+    with report.stage('feature_engineering') as stage:
+        engineer_features(final_dataset)
+        stage.output(final_dataset)
+        stage.count(undated_rows=int(final_dataset['collection_year'].isna().sum()))
+
+    # Add Summary Count Columns
+    print("Adding summary count columns...")
+    with report.stage('summary_counts') as stage:
+        add_summary_counts(final_dataset, gene_matrix, class_matrix)
+        stage.output(final_dataset)
+
+    # --- 5. Clean Up and Save the Final Master Dataset ---
+    final_dataset = move_isolate_id_first(final_dataset)
+    print(f"Saving final master dataset to '{output_filename}'...")
+    with report.stage('save') as stage:
+        write_table(final_dataset, output_filename, workers=args.workers)
+        stage.input(final_dataset)
+    return final_dataset.shape
+
+
+def build_in_chunks(args, report, output_filename, chunksize):
+    """Build the master dataset ``chunksize`` isolates at a time; returns its shape.
+
+    Pass 1 streams the gene/class lists to collect the global vocabularies
+    (with how many isolates carry each item) and the isolate accessions.
+    Pass 2 streams the table again, encodes each chunk against the global
+    vocabularies, joins the metadata, adds the engineered features and
+    appends the chunk to the output. Memory is bounded by the chunk size,
+    plus the metadata rows and accessions of our isolates.
+    """
+    require_columns(read_columns(args.input), SUMMARY_COLUMNS, args.input)
+
+    # --- Pass 1: collect the gene and class vocabularies ---
+    print(f"Pass 1: collecting gene and class vocabularies ({chunksize} isolates per chunk)...")
+    with report.stage('vocabulary') as stage:
+        gene_counts, class_counts = Counter(), Counter()
+        isolate_ids = []
+        for chunk in iter_table(args.input, columns=['Isolate_ID', 'AMR_Gene_Profile', 'Drug_Resistance_Phenotype'],
+                                chunksize=chunksize):
+            gene_counts.update(count_items(chunk['AMR_Gene_Profile']))
+            class_counts.update(count_items(chunk['Drug_Resistance_Phenotype']))
+            isolate_ids.extend(chunk['Isolate_ID'])
+        # Sorted like the in-memory encoder's columns
+        gene_vocabulary, class_vocabulary = sorted(gene_counts), sorted(class_counts)
+        stage.output((len(isolate_ids), 3))
+        stage.count(genes=len(gene_vocabulary), classes=len(class_vocabulary),
+                    gene_hits=sum(gene_counts.values()), class_hits=sum(class_counts.values()))
+
+    print("Loading metadata for these isolates...")
+    with report.stage('load_metadata') as stage:
+        accession_keys = normalize_accessions(pd.Series(isolate_ids, dtype=object))
+        sources, pub_rows_scanned, pub_rows_kept = load_metadata_sources(args, isolate_ids, accession_keys)
+        # Give every chunk the dtypes of one full join (e.g. ints become floats if any isolate is unmatched)
+        sources = unify_join_dtypes(sources, accession_keys)
+        stage.count(pub_metadata_rows=pub_rows_scanned, pub_metadata_rows_kept=pub_rows_kept)
+    del isolate_ids, accession_keys
+
+    # --- Pass 2: encode, enrich and append each chunk ---
+    print(f"Pass 2: building and saving to '{output_filename}' chunk by chunk...")
+    n_rows, n_columns = 0, 0
+    join_stats = {}
+    sparse_blocks, sparse_ids = [], []
+    with report.stage('build') as stage, TableWriter(output_filename, workers=args.workers) as writer:
+        for amr_lists_df in iter_table(args.input, columns=SUMMARY_COLUMNS, chunksize=chunksize):
+            amr_core_df, gene_matrix, class_matrix = encode_profiles(amr_lists_df, gene_vocabulary, class_vocabulary)
+            if args.sparse_output:
+                sparse_blocks.append(hstack_csr(gene_matrix, class_matrix))
+                sparse_ids.extend(amr_lists_df['Isolate_ID'])
+
+            final_dataset, chunk_stats = attach(amr_core_df, normalize_accessions(amr_core_df['Isolate_ID']), sources)
+            for name, counts in chunk_stats.items():
+                totals = join_stats.setdefault(name, dict(counts, left_rows=0, matched_rows=0, unmatched_rows=0, result_rows=0))
+                for key in ('left_rows', 'matched_rows', 'unmatched_rows', 'result_rows'):
+                    totals[key] += counts[key]
+            engineer_features(final_dataset)
+            add_summary_counts(final_dataset, gene_matrix, class_matrix)
+
+            writer.write(move_isolate_id_first(final_dataset))
+            n_rows += len(final_dataset)
+            n_columns = final_dataset.shape[1]
+        stage.merges(join_stats)
+        stage.output((n_rows, n_columns))
+
+    if args.sparse_output:
+        save_csr(args.sparse_output, vstack_csr(*sparse_blocks), row_ids=sparse_ids)
+        print(f"Sparse feature matrix saved to {args.sparse_output}")
+    return n_rows, n_columns
+
+
+def run(args):
+    """Build the master dataset from ``args.input`` into ``args.output``; returns its shape."""
+    # Stage timings, memory and row counts, saved next to the output
+    report = RunReport('build_master_dataset', args.output, profile_stage=args.profile_stage,
+                       trace_memory=args.trace_memory, args=args)
+
+    print("Starting the final data build process...")
+
+    output_filename = args.output
+    if args.chunksize:
+        final_shape = build_in_chunks(args, report, output_filename, args.chunksize)
+    else:
+        final_shape = build_in_memory(args, report, output_filename)
+    report.save()
+
+    print("\n--- Build Complete! ---")
+    print(f"Your final, feature-engineered dataset is ready: {output_filename}")
+    print("New engineered features added:")
+    print("- collection_year, collection_month, collection_season")
+    print("- host_standardized, isolation_source_standardized")
+    print("- total_amr_genes, total_resistance_classes")
+    print(f"Final dataset shape: {final_shape}")
+    return final_shape
+
+
+def main(argv=None, prog=None):
+    args = build_parser(prog).parse_args(argv)
+    try:
+        run(args)
+    except FileNotFoundError as e:
+        print(f"Error: Make sure '{e.filename}' is in the same directory as the script.")
+        return 1
+    return 0
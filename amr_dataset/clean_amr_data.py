@@ -0,0 +1,74 @@
+"""One-hot encode the gene profiles and resistance phenotypes of the summary dataset (``amr-dataset encode``)."""
+import argparse
+
+import pandas as pd
+
+from .amr_encoding import encode_lists, hstack_csr, save_csr, to_frame
+from .amr_io import read_table, write_table
+from .amr_schema import SUMMARY_COLUMNS
+from .instrumentation import RunReport, add_report_arguments
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="One-hot encode AMR gene profiles and resistance phenotypes.")
+    parser.add_argument('--input', default='amr_summary_dataset.csv', help="Summary dataset (.csv, .parquet or .feather)")
+    parser.add_argument('--output', default='amr_summary_cleaned.csv', help="Encoded dataset (.csv, .parquet or .feather)")
+    parser.add_argument('--sparse-output', help="Also save the gene/phenotype matrix as a sparse .npz (scipy CSR)")
+    add_report_arguments(parser)
+    return parser
+
+
+def run(args):
+    """Encode ``args.input`` into ``args.output``; returns the encoded shape."""
+    # Stage timings, memory and row counts, saved next to the output
+    report = RunReport('clean_amr_data', args.output, profile_stage=args.profile_stage,
+                       trace_memory=args.trace_memory, args=args)
+
+    # Load the dataset
+    with report.stage('load') as stage:
+        df = read_table(args.input, required=SUMMARY_COLUMNS)
+        stage.output(df)
+
+    with report.stage('encode') as stage:
+        stage.input(df)
+        # One-hot encode AMR_Gene_Profile (missing values count as no genes)
+        genes_matrix = encode_lists(df['AMR_Gene_Profile'])
+        genes_dummies = to_frame(genes_matrix, index=df.index)
+
+        # One-hot encode Drug_Resistance_Phenotype
+        phenotypes_matrix = encode_lists(df['Drug_Resistance_Phenotype'])
+        phenotypes_dummies = to_frame(phenotypes_matrix, index=df.index)
+
+        # Concatenate the dummies with the original DataFrame
+        df_cleaned = pd.concat([df, genes_dummies, phenotypes_dummies], axis=1)
+
+        # Drop the original AMR columns
+        df_cleaned = df_cleaned.drop(columns=['AMR_Gene_Profile', 'Drug_Resistance_Phenotype'])
+        stage.output(df_cleaned)
+        stage.count(genes=len(genes_matrix.columns), phenotypes=len(phenotypes_matrix.columns))
+
+    # Save the cleaned dataset
+    with report.stage('save') as stage:
+        write_table(df_cleaned, args.output)
+        stage.input(df_cleaned)
+
+        # Optionally export the sparse feature matrix for ML consumers
+        if args.sparse_output:
+            save_csr(args.sparse_output, hstack_csr(genes_matrix, phenotypes_matrix), row_ids=df['Isolate_ID'])
+            print(f"Sparse feature matrix saved to {args.sparse_output}")
+    report.save()
+
+    # Print confirmation and dimensions
+    print(f"Cleaned dataset saved to {args.output}")
+    print(f"Dataset dimensions: {df_cleaned.shape[0]} rows, {df_cleaned.shape[1]} columns")
+    return df_cleaned.shape
+
+
+def main(argv=None, prog=None):
+    args = build_parser(prog).parse_args(argv)
+    try:
+        run(args)
+    except FileNotFoundError as e:
+        print(f"Error: Make sure '{e.filename}' exists.")
+        return 1
+    return 0
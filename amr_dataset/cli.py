@@ -0,0 +1,61 @@
+"""The ``amr-dataset`` command line: one subcommand per pipeline step or tool.
+
+Only the module of the chosen subcommand is imported, so ``--help``,
+``--version`` and standard-library commands such as ``check`` start without
+loading pandas or numpy. Each subcommand parses its own options:
+``amr-dataset encode --input a.csv`` runs ``clean_amr_data.main(['--input',
+'a.csv'])``, which in-process callers can also call directly.
+
+Usage:
+    amr-dataset --help
+    amr-dataset ingest --results-dir "data/raw/ABRicate Run" --workers 8
+    amr-dataset build --input amr_summary_dataset.csv --chunksize 100000
+    amr-dataset check genes AP039418.1
+"""
+import argparse
+import importlib
+import sys
+
+from . import __version__
+
+# Subcommand -> (module in this package, one-line description)
+COMMANDS = {
+    'ingest': ('process_amr_data', "Summarise ABRicate reports and genome FASTA files per isolate"),
+    'encode': ('clean_amr_data', "One-hot encode gene profiles and resistance phenotypes"),
+    'select': ('feature_selection', "Keep the features within a prevalence band"),
+    'merge': ('merge_datasets', "Join the encoded dataset with harmonized sample metadata"),
+    'prefixed': ('final_dataset_creator', "Build the prefixed one-hot dataset with sample metadata"),
+    'build': ('build_master_dataset', "Build the master dataset with metadata and engineered features"),
+    'index': ('amr_index', "Build the SQLite isolate/gene lookup index"),
+    'check': ('dataset_check', "Spot-check and query the SQLite lookup index"),
+    'resistance': ('resistance_index', "Query the gene <-> resistance class <-> isolate index"),
+    'similarity': ('resistome_similarity', "Nearest isolates and pairwise resistome distances"),
+    'delta': ('release_delta', "Write or apply delta files between dataset releases"),
+    'pipeline': ('run_pipeline', "Run the stale pipeline stages in dependency order"),
+}
+
+
+def build_parser():
+    """Top-level parser; lists the subcommands without importing them."""
+    parser = argparse.ArgumentParser(prog='amr-dataset', description="Build and query the AMR genome dataset.",
+                                     epilog="Run 'amr-dataset <command> --help' for the options of a command.")
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    commands = parser.add_subparsers(dest='command', metavar='<command>', required=True)
+    for name, (_, description) in COMMANDS.items():
+        commands.add_parser(name, help=description, add_help=False)
+    return parser
+
+
+def load_command(name):
+    """Import and return the module implementing subcommand ``name``."""
+    return importlib.import_module(f'{__package__}.{COMMANDS[name][0]}')
+
+
+def main(argv=None):
+    """Run ``amr-dataset`` with ``argv`` (default: the process arguments); returns the exit status."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS:
+        # --help, --version, or a missing/unknown command: argparse prints and exits
+        build_parser().parse_args(argv)
+    command, rest = argv[0], argv[1:]
+    return load_command(command).main(rest, prog=f'amr-dataset {command}')
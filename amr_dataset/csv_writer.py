@@ -0,0 +1,198 @@
+"""Parallel CSV export for the wide gene/class tables.
+
+:class:`CsvWriter` splits each DataFrame into row blocks, formats the blocks
+in worker processes and writes them in order into one file. The bytes are
+the same as ``df.to_csv(path, index=False)`` (and ``mode='a', header=False``
+for later chunks), so a release written this way keeps its fingerprint.
+
+Integer columns whose values are all 0/1 (the presence flags, which are
+most of the columns) skip pandas' number formatting: each run of adjacent
+flag columns becomes a ``uint8`` matrix of ``'0'``/``'1'`` and comma bytes.
+Runs of other columns are still formatted by ``to_csv``.
+
+``.gz`` output is compressed block by block in the workers (a multi-member
+gzip file, which gzip, pandas and zcat read as one stream); ``.zst`` output
+is one zstd frame compressed by zstd's own threads (needs ``zstandard``).
+Other compressed extensions are written by pandas directly.
+"""
+import gzip
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# Rows formatted per task; bounds the memory of the blocks in flight
+BLOCK_ROWS = 20_000
+ENCODING = 'utf-8'
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+ZERO, COMMA, NEWLINE = ord('0'), ord(','), ord('\n')
+
+
+def csv_compression(path):
+    """``None``, ``'gzip'``, ``'zstd'`` or ``'other'`` (bz2/xz/zip) from the extension."""
+    ext = os.path.splitext(path)[1].lower()
+    return {'': None, '.gz': 'gzip', '.zst': 'zstd', '.bz2': 'other', '.xz': 'other', '.zip': 'other'}.get(ext)
+
+
+def _is_flag(series):
+    """Plain integer column holding only 0 and 1."""
+    if series.dtype.kind not in 'iu':
+        return False
+    values = series.to_numpy()
+    return len(values) == 0 or (values.min() >= 0 and values.max() <= 1)
+
+
+def _column_runs(block):
+    """``(start, stop, is_flag)`` for each run of adjacent flag / other columns."""
+    runs = []
+    for i in range(block.shape[1]):
+        flag = _is_flag(block.iloc[:, i])
+        if runs and runs[-1][2] == flag:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1, flag])
+    return runs
+
+
+def _flag_cells(block):
+    """Per-row ``b'0,1,...,'`` strings for a run of flag columns."""
+    width = 2 * block.shape[1]
+    cells = np.empty((len(block), width), dtype=np.uint8)
+    cells[:, 0::2] = block.to_numpy(dtype=np.uint8)
+    cells[:, 0::2] += ZERO
+    cells[:, 1::2] = COMMA
+    return cells.view(f'S{width}').ravel().tolist()
+
+
+def _text_cells(block):
+    """Per-row ``b'a,b,...,'`` strings formatted by ``to_csv``, or None if a field spans lines.
+
+    The blank extra column gives every line its trailing comma and keeps a
+    lone empty field from being written as ``""``.
+    """
+    frame = block.set_axis(range(block.shape[1]), axis=1)
+    frame[block.shape[1]] = ''
+    lines = frame.to_csv(index=False, header=False, lineterminator='\n').encode(ENCODING).split(b'\n')
+    return lines[:-1] if len(lines) == len(block) + 1 else None
+
+
+def format_rows(block, lineterminator=os.linesep):
+    """The ``to_csv(index=False, header=False)`` bytes of ``block``."""
+    runs = _column_runs(block) if block.shape[1] > 1 else []
+    if any(flag for _, _, flag in runs):
+        cells = [(_flag_cells if flag else _text_cells)(block.iloc[:, start:stop]) for start, stop, flag in runs]
+        if all(column is not None for column in cells):
+            terminator = lineterminator.encode(ENCODING)
+            cells.append([terminator] * len(block))
+            text = np.frombuffer(b''.join(chain.from_iterable(zip(*cells))), dtype=np.uint8)
+            # Every row now ends "...,<terminator>"; drop the comma before it
+            keep = np.ones(len(text), dtype=bool)
+            keep[np.flatnonzero(text == NEWLINE) - len(terminator)] = False
+            return text[keep].tobytes()
+    return block.to_csv(index=False, header=False, lineterminator=lineterminator).encode(ENCODING)
+
+
+def _compress(data, compression):
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0) if compression == 'gzip' else data
+
+
+def _encode_block(block, lineterminator, compression):
+    return _compress(format_rows(block, lineterminator), compression)
+
+
+def _blockwise(df):
+    """False if ``to_csv`` would format some column differently in row blocks.
+
+    pandas picks the datetime format from all values of the column at once.
+    """
+    return not any(pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype)
+                   for dtype in df.dtypes)
+
+
+class CsvWriter:
+    """Write DataFrame chunks to one CSV file, formatting row blocks in parallel.
+
+    ``workers`` > 1 formats (and gzip-compresses) blocks in that many
+    processes; blocks are written in order. Use as a context manager; the
+    header comes from the first chunk.
+    """
+
+    def __init__(self, path, workers=1, block_rows=BLOCK_ROWS, lineterminator=os.linesep):
+        self.path = path
+        self.workers = workers
+        self.block_rows = block_rows
+        self.lineterminator = lineterminator
+        self.compression = csv_compression(path)
+        self._handle = None
+        self._pool = None
+        self._wrote_header = False
+
+    def _open(self):
+        if self.compression == 'zstd':
+            import zstandard
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=self.workers if self.workers > 1 else 0)
+            self._handle = compressor.stream_writer(open(self.path, 'wb'))
+        else:
+            self._handle = open(self.path, 'wb')
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def _map(self, func, blocks):
+        """``map(func, blocks)`` in order, keeping at most two blocks per worker in flight."""
+        if self._pool is None:
+            yield from map(func, blocks)
+            return
+        pending = deque()
+        for block in blocks:
+            pending.append(self._pool.submit(func, block))
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def write(self, df):
+        if self.compression == 'other':
+            df.to_csv(self.path, index=False, header=not self._wrote_header, mode='a' if self._wrote_header else 'w',
+                      lineterminator=self.lineterminator)
+            self._wrote_header = True
+            return
+
+        if self._handle is None:
+            self._open()
+        encode = partial(_encode_block, lineterminator=self.lineterminator, compression=self.compression)
+        if not self._wrote_header:
+            header = df.iloc[:0].to_csv(index=False, lineterminator=self.lineterminator)
+            self._handle.write(_compress(header.encode(ENCODING), self.compression))
+            self._wrote_header = True
+        if not _blockwise(df):
+            self._handle.write(encode(df))
+            return
+        blocks = (df.iloc[start:start + self.block_rows] for start in range(0, len(df), self.block_rows))
+        for data in self._map(encode, blocks):
+            self._handle.write(data)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_csv(df, path, workers=1, block_rows=BLOCK_ROWS):
+    """``df.to_csv(path, index=False)``, with row blocks formatted by ``workers`` processes."""
+    with CsvWriter(path, workers=workers, block_rows=block_rows) as writer:
+        writer.write(df)
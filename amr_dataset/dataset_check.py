@@ -0,0 +1,89 @@
+"""Spot-check and query the AMR dataset through its SQLite lookup index.
+
+The index (amr_index.sqlite) is built by ``amr-dataset index`` as part of the
+pipeline, so checks answer in milliseconds without loading the dataset.
+
+Examples:
+    amr-dataset check                                   # verify the example isolate
+    amr-dataset check genes AP039418.1                  # genes of one isolate
+    amr-dataset check genes AP039418.1 --classes        # its resistance classes
+    amr-dataset check isolates CTX-M-15 MCR-1           # isolates carrying both
+    amr-dataset check isolates CTX-M-15 MCR-1 --any     # isolates carrying either
+    amr-dataset check verify AP039418.1 gadW gadX mdtF  # presence table
+"""
+import argparse
+
+from . import amr_index
+
+# The isolate and genes checked when no command is given; the genes are
+# known to be in its ABRicate .tsv report
+EXAMPLE_ISOLATE = 'AP039418.1'
+EXAMPLE_GENES = ['gadW', 'gadX', 'mdtF', 'mdtE', 'CMY-59']
+
+
+def verify(conn, isolate_id, genes):
+    """Print the presence of each gene in an isolate; False if any check fails."""
+    record = amr_index.get_isolate(conn, isolate_id)
+    if record is None:
+        print(f"Error checking isolate: '{isolate_id}' is not in the index.")
+        return False
+    print(f"--- Verifying genes for isolate {isolate_id} ---")
+    presence = amr_index.has_features(conn, isolate_id, genes)
+    unknown = set(genes) - amr_index.known_features(conn, genes)
+    for gene, present in presence.items():
+        note = '  (gene not in dataset)' if gene in unknown else ''
+        print(f"{gene:<20} {int(present)}{note}")
+    return not unknown
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Query the AMR isolate/gene lookup index.")
+    parser.add_argument('--db', default='amr_index.sqlite', help="SQLite index built by amr_index.py")
+    commands = parser.add_subparsers(dest='command')
+
+    genes_cmd = commands.add_parser('genes', help="List the genes (or classes) of an isolate")
+    genes_cmd.add_argument('isolate')
+    genes_cmd.add_argument('--classes', action='store_true', help="List resistance classes instead of genes")
+
+    isolates_cmd = commands.add_parser('isolates', help="List isolates carrying the given genes (or classes)")
+    isolates_cmd.add_argument('names', nargs='+')
+    isolates_cmd.add_argument('--any', action='store_true', help="Match isolates carrying any of the names (default: all)")
+    isolates_cmd.add_argument('--classes', action='store_true', help="Names are resistance classes, not genes")
+
+    verify_cmd = commands.add_parser('verify', help="Check which of the given genes an isolate carries")
+    verify_cmd.add_argument('isolate')
+    verify_cmd.add_argument('genes', nargs='+')
+
+    commands.add_parser('summary', help="Count isolates, genes and classes")
+    args = parser.parse_args(argv)
+
+    try:
+        conn = amr_index.connect(args.db)
+    except FileNotFoundError:
+        print(f"Error: index '{args.db}' not found. Build it with: amr-dataset index --output {args.db}")
+        return 1
+
+    try:
+        if args.command == 'genes':
+            if amr_index.get_isolate(conn, args.isolate) is None:
+                print(f"Error: '{args.isolate}' is not in the index.")
+                return 1
+            kind = 'class' if args.classes else 'gene'
+            for name in amr_index.isolate_features(conn, args.isolate, kind):
+                print(name)
+        elif args.command == 'isolates':
+            kind = 'class' if args.classes else 'gene'
+            for isolate_id in amr_index.isolates_with(conn, args.names, kind, require_all=not args.any):
+                print(isolate_id)
+        elif args.command == 'summary':
+            for key, value in amr_index.counts(conn).items():
+                print(f"{key}: {value}")
+        elif args.command == 'verify':
+            if not verify(conn, args.isolate, args.genes):
+                return 1
+        else:
+            if not verify(conn, EXAMPLE_ISOLATE, EXAMPLE_GENES):
+                return 1
+    finally:
+        conn.close()
+    return 0
@@ -0,0 +1,138 @@
+"""Prevalence-based feature selection over the encoded dataset (``amr-dataset select``)."""
+import argparse
+import hashlib
+
+import numpy as np
+
+from .amr_io import NON_FEATURE_COLUMNS, TableWriter, iter_table, read_columns, table_format
+from .instrumentation import RunReport, add_report_arguments
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Select variable AMR features by prevalence, streaming the encoded matrix in row chunks.")
+    parser.add_argument('--input', default='amr_summary_cleaned.csv', help="Encoded AMR dataset (.csv, .parquet or .feather)")
+    parser.add_argument('--output', default='amr_dataset_variable_features.csv', help="Variable features dataset")
+    parser.add_argument('--min-freq', type=float, default=1.0, help="Minimum prevalence in percent (default: 1)")
+    parser.add_argument('--max-freq', type=float, default=95.0, help="Maximum prevalence in percent (default: 95)")
+    parser.add_argument('--drop-duplicates', action='store_true', help="Keep one column from each group of identical feature columns")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="Rows per chunk; bounds peak memory")
+    add_report_arguments(parser)
+    return parser
+
+
+def run(args):
+    """Select the variable features of ``args.input`` into ``args.output``; returns the output shape."""
+    # Stage timings, memory and row counts, saved next to the output
+    report = RunReport('feature_selection', args.output, profile_stage=args.profile_stage,
+                       trace_memory=args.trace_memory, args=args)
+
+    # Identify gene and phenotype columns (binary features)
+    # Gene columns are those that start with gene names (contain parentheses or are gene symbols)
+    # Phenotype columns are the resistance class names (no parentheses, lowercase)
+
+    # Get all columns except the basic metadata columns (since enriched dataset doesn't exist yet)
+    # and the assembly statistics
+    metadata_cols = NON_FEATURE_COLUMNS
+    all_cols = read_columns(args.input)
+    feature_cols = [col for col in all_cols if col not in metadata_cols]
+    metadata_cols = [col for col in all_cols if col in metadata_cols]
+
+    print(f"Total features: {len(feature_cols)}")
+
+    # CSV metadata is passed through as text so every chunk writes it exactly as read
+    read_options = {}
+    if table_format(args.input) == 'csv':
+        read_options = {'dtype': {col: str for col in metadata_cols}, 'keep_default_na': False}
+
+    # --- Pass 1: count feature prevalence (and fingerprint columns) chunk by chunk ---
+    print("Counting feature frequencies...")
+    n_rows = 0
+    counts = np.zeros(len(feature_cols), dtype=np.int64)
+    column_hashes = [hashlib.blake2b(digest_size=16) for _ in feature_cols] if args.drop_duplicates else None
+    with report.stage('count') as stage:
+        for chunk in iter_table(args.input, columns=feature_cols, chunksize=args.chunksize):
+            values = chunk.to_numpy(dtype=np.uint8)
+            n_rows += len(values)
+            counts += values.sum(axis=0, dtype=np.int64)
+            if column_hashes is not None:
+                # One bit per row, packed column-wise, so equal columns hash equally
+                packed = np.ascontiguousarray(np.packbits(values.astype(bool), axis=0).T)
+                for digest, bits in zip(column_hashes, packed):
+                    digest.update(bits.tobytes())
+        stage.input((n_rows, len(all_cols)))
+
+    # Calculate frequency of each feature (percentage)
+    frequencies = counts / n_rows * 100 if n_rows else np.zeros(len(feature_cols))
+    feature_frequencies = dict(zip(feature_cols, frequencies))
+
+    # Print frequency distribution
+    print("\nFeature frequency distribution:")
+    freq_counts = {'Very Common (>95%)': 0, 'Common (50-95%)': 0, 'Variable (5-50%)': 0, 'Rare (1-5%)': 0, 'Very Rare (<1%)': 0}
+    bins = np.digitize(frequencies, [1, 5, 50, 95], right=True)
+    for category, count in zip(reversed(list(freq_counts)), np.bincount(bins, minlength=5)):
+        freq_counts[category] = int(count)
+
+    for category, count in freq_counts.items():
+        print(f"{category}: {count} features")
+
+    # Select variable features (within the prevalence band, 1% to 95% by default)
+    # This removes "housekeeping" genes that are always present and extremely rare genes
+    in_band = (frequencies >= args.min_freq) & (frequencies <= args.max_freq)
+    variable_features = [col for col, keep in zip(feature_cols, in_band) if keep]
+
+    print(f"\nSelected {len(variable_features)} variable features ({args.min_freq:g}-{args.max_freq:g}% frequency)")
+
+    # Optionally drop exact-duplicate columns (genes that always co-occur), keeping the first
+    if column_hashes is not None:
+        first_with_hash = {}
+        duplicates = {}
+        for col, keep, digest in zip(feature_cols, in_band, column_hashes):
+            if not keep:
+                continue
+            key = digest.digest()
+            if key in first_with_hash:
+                duplicates.setdefault(first_with_hash[key], []).append(col)
+            else:
+                first_with_hash[key] = col
+        dropped = {col for group in duplicates.values() for col in group}
+        variable_features = [col for col in variable_features if col not in dropped]
+        print(f"Dropped {len(dropped)} duplicate features; kept {len(variable_features)}")
+        for kept, group in duplicates.items():
+            print(f"  {kept} == {', '.join(group)}")
+
+    # --- Pass 2: write the variable features dataset chunk by chunk ---
+    variable_cols = metadata_cols + variable_features
+    output_filename = args.output
+    n_written = 0
+    with report.stage('save') as stage, TableWriter(output_filename) as writer:
+        for chunk in iter_table(args.input, columns=variable_cols, chunksize=args.chunksize, **read_options):
+            writer.write(chunk)
+            n_written += len(chunk)
+        stage.output((n_written, len(variable_cols)))
+        stage.count(selected_features=len(variable_features), removed_features=len(feature_cols) - len(variable_features))
+
+    print(f"Saved variable features dataset to {output_filename}")
+    print(f"Dataset shape: {(n_written, len(variable_cols))}")
+
+    # Print some statistics about removed features
+    removed_features = len(feature_cols) - len(variable_features)
+    print(f"Removed {removed_features} features that were too common (>{args.max_freq:g}%), too rare (<{args.min_freq:g}%) or duplicated")
+
+    # Show examples of removed features
+    very_common = [col for col, freq in feature_frequencies.items() if freq > args.max_freq]
+    very_rare = [col for col, freq in feature_frequencies.items() if freq < args.min_freq]
+
+    print(f"\nExamples of very common features removed (>{args.max_freq:g}%): {very_common[:5]}")
+    print(f"Examples of very rare features removed (<{args.min_freq:g}%): {very_rare[:5]}")
+    report.save()
+    return (n_written, len(variable_cols))
+
+
+def main(argv=None, prog=None):
+    args = build_parser(prog).parse_args(argv)
+    try:
+        run(args)
+    except FileNotFoundError as e:
+        print(f"Error: Make sure '{e.filename}' exists.")
+        return 1
+    return 0
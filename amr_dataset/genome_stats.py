@@ -0,0 +1,141 @@
+"""Streaming genome and assembly statistics for FASTA assemblies.
+
+Reads the file as fixed-size byte buffers and tallies a byte histogram of
+each sequence segment with numpy, so no per-record strings or SeqRecord
+objects are built and memory use does not depend on genome size. One matrix
+product per buffer turns the histograms into per-contig length, G/C and
+ambiguous base counts, from which the assembly statistics (contig count,
+largest contig, N50/L50, ambiguous-base fraction, per-contig GC spread) are
+computed with array arithmetic. Gzipped inputs (``.gz``) are decompressed on
+the fly.
+"""
+import gzip
+
+import numpy as np
+
+# Read size for each buffer pulled from the file
+CHUNK_SIZE = 1 << 20
+
+# Bytes that are stripped from sequence lines (same set as Bio.SeqIO's parser)
+WHITESPACE = list(b'\n\r \t')
+GC_BASES = list(b'GCgc')
+AT_BASES = list(b'ATat')
+
+# Class of every byte value; anything that is not whitespace or A/C/G/T
+# (N, IUPAC codes, gaps) counts as an ambiguous base
+SPACE, GC, AT, AMBIGUOUS = range(4)
+_byte_classes = np.full(256, AMBIGUOUS)
+_byte_classes[WHITESPACE] = SPACE
+_byte_classes[GC_BASES] = GC
+_byte_classes[AT_BASES] = AT
+# One-hot (256, 4) matrix: a byte histogram times BYTE_CLASS gives class counts
+BYTE_CLASS = np.eye(4, dtype=np.int64)[_byte_classes]
+
+
+def open_fasta(path):
+    """Open a FASTA file for binary reading, decompressing ``.gz`` files."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def scan_fasta(path, chunk_size=CHUNK_SIZE):
+    """Count bases per contig of a FASTA file in one pass.
+
+    Returns a dict with ``length`` (bases, whitespace excluded), ``gc`` (G/C
+    count, case-insensitive) and ``ambiguous`` (non-ACGT bases) for the whole
+    file, plus the per-contig arrays ``contig_lengths`` and ``contig_gc`` in
+    file order. Raises ValueError if the file has content before the first
+    ``>`` header, as Bio.SeqIO does.
+    """
+    # Class counts per sequence segment; a contig split across buffers has
+    # several segments, which are summed per contig at the end
+    segment_contigs = []
+    segment_counts = []
+    contig = -1
+    # 'start' until the first header, then 'header' or 'sequence'
+    state = 'start'
+    with open_fasta(path) as handle:
+        while True:
+            buf = handle.read(chunk_size)
+            if not buf:
+                break
+            view = np.frombuffer(buf, dtype=np.uint8)
+            # Byte histogram of each sequence segment in this buffer
+            histograms = []
+            pos = 0
+            end = len(buf)
+            while pos < end:
+                if state == 'sequence':
+                    stop = buf.find(b'>', pos)
+                    if stop == -1:
+                        stop = end
+                    if stop > pos:
+                        segment_contigs.append(contig)
+                        histograms.append(np.bincount(view[pos:stop], minlength=256))
+                    if stop < end:
+                        state = 'header'
+                        contig += 1
+                        stop += 1
+                    pos = stop
+                elif state == 'header':
+                    eol = buf.find(b'\n', pos)
+                    if eol == -1:
+                        pos = end
+                    else:
+                        state = 'sequence'
+                        pos = eol + 1
+                else:
+                    if buf[pos:pos + 1] != b'>':
+                        raise ValueError(f"{path} does not start with a '>' FASTA header")
+                    state = 'header'
+                    contig += 1
+                    pos += 1
+            if histograms:
+                segment_counts.append(np.vstack(histograms) @ BYTE_CLASS)
+
+    n_contigs = contig + 1
+    per_contig = np.zeros((n_contigs, 4), dtype=np.int64)
+    if segment_counts:
+        np.add.at(per_contig, np.array(segment_contigs), np.concatenate(segment_counts))
+    contig_lengths = per_contig[:, GC] + per_contig[:, AT] + per_contig[:, AMBIGUOUS]
+    return {
+        'length': int(contig_lengths.sum()),
+        'gc': int(per_contig[:, GC].sum()),
+        'ambiguous': int(per_contig[:, AMBIGUOUS].sum()),
+        'contig_lengths': contig_lengths,
+        'contig_gc': per_contig[:, GC],
+    }
+
+
+def gc_percent(stats):
+    """GC content in percent, rounded to two decimals (0.0 for empty genomes)."""
+    return round((stats['gc'] / stats['length']) * 100, 2) if stats['length'] > 0 else 0.0
+
+
+def assembly_stats(stats):
+    """Assembly quality statistics from a :func:`scan_fasta` result.
+
+    Returns ``contigs``, ``largest_contig``, ``n50``, ``l50`` (the fewest
+    contigs holding half the bases), ``ambiguous_fraction`` (non-ACGT share
+    of the bases) and ``contig_gc_sd`` (standard deviation of the per-contig
+    GC percentages, over non-empty contigs). Empty genomes give zeros.
+    """
+    lengths = stats['contig_lengths']
+    n_contigs = len(lengths)
+    if stats['length'] == 0:
+        return {'contigs': n_contigs, 'largest_contig': 0, 'n50': 0, 'l50': 0,
+                'ambiguous_fraction': 0.0, 'contig_gc_sd': 0.0}
+    ordered = np.sort(lengths)[::-1]
+    # First contig (longest first) at which the running total reaches half the genome
+    l50 = int(np.searchsorted(np.cumsum(ordered), stats['length'] / 2)) + 1
+    nonempty = lengths > 0
+    contig_gc = stats['contig_gc'][nonempty] / lengths[nonempty] * 100
+    return {
+        'contigs': n_contigs,
+        'largest_contig': int(ordered[0]),
+        'n50': int(ordered[l50 - 1]),
+        'l50': l50,
+        'ambiguous_fraction': round(stats['ambiguous'] / stats['length'], 6),
+        'contig_gc_sd': round(float(contig_gc.std()), 2),
+    }
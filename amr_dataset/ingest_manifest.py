@@ -0,0 +1,86 @@
+"""Per-isolate manifest cache for incremental ingestion.
+
+The manifest is a JSON file keyed by Isolate_ID. Each entry records the
+path, size, mtime and SHA-256 of the isolate's ABRicate ``.tsv`` and genome
+FASTA, together with the summary row and gene -> class links computed from
+them. On a rerun an isolate whose files still match its entry reuses the
+cached row; only new or changed isolates are processed again, and isolates
+whose reports were deleted are dropped. The run settings that shape the rows (the ABRicate hit
+thresholds) are stored alongside, and a manifest written with different
+settings is rebuilt.
+"""
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 3
+
+# Read size used when hashing files
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path):
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_stat(path):
+    """Cheap signature of a file (path, size, mtime), or None if it is missing."""
+    if path is None:
+        return None
+    st = os.stat(path)
+    return {'path': path, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def same_stat(current, cached):
+    """True if two signatures agree on path, size and mtime."""
+    if current is None or cached is None:
+        return current is cached
+    return all(current[key] == cached.get(key) for key in ('path', 'size', 'mtime_ns'))
+
+
+def with_hash(signature, cached=None):
+    """Add a content hash to ``signature``, reusing ``cached``'s if the stat matches."""
+    if signature is None:
+        return None
+    if cached is not None and same_stat(signature, cached) and 'sha256' in cached:
+        return dict(signature, sha256=cached['sha256'])
+    return dict(signature, sha256=file_hash(signature['path']))
+
+
+def same_content(current, cached):
+    """True if two hashed signatures describe the same file contents."""
+    if current is None or cached is None:
+        return current is cached
+    return current['path'] == cached.get('path') and current['sha256'] == cached.get('sha256')
+
+
+def load_manifest(path, settings=None):
+    """Load the isolate entries of a manifest, or an empty dict if unusable."""
+    if path is None or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable manifest {path}: {e}")
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        print(f"Warning: manifest {path} has an old format; rebuilding it.")
+        return {}
+    if manifest.get('settings') != settings:
+        print(f"Warning: manifest {path} was built with different settings; rebuilding it.")
+        return {}
+    return manifest.get('isolates', {})
+
+
+def save_manifest(path, entries, settings=None):
+    """Write manifest entries atomically (temp file + rename)."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as handle:
+        json.dump({'version': MANIFEST_VERSION, 'settings': settings, 'isolates': entries}, handle, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,173 @@
+"""Per-stage timing, memory and shape instrumentation for the pipeline scripts.
+
+A script creates one RunReport and wraps each step in ``report.stage(name)``.
+For every stage the report records wall and CPU time, peak RSS, optionally
+the tracemalloc peak, the row/column counts of its input and output tables,
+and for merges how many rows found a match. ``report.save()`` writes it all
+as JSON next to the output dataset (``<output>.run_report.json``). One stage
+can be run under cProfile, with the stats dumped to ``<output>.<stage>.prof``.
+
+Peak RSS is per stage on Linux (the kernel high-water mark is reset at the
+start of each stage); elsewhere it is the process high-water mark so far.
+"""
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROC_STATUS = '/proc/self/status'
+PROC_CLEAR_REFS = '/proc/self/clear_refs'
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak RSS counter; True if supported (Linux)."""
+    try:
+        with open(PROC_CLEAR_REFS, 'w') as handle:
+            handle.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    """Peak resident set size in MB, or None if unavailable."""
+    try:
+        with open(PROC_STATUS) as handle:
+            for line in handle:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / 2**20 if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def shape_of(table):
+    """``{'rows', 'columns'}`` of a DataFrame/Series, or of a ``(rows, columns)`` tuple for streamed tables."""
+    shape = table if isinstance(table, tuple) else getattr(table, 'shape', None)
+    if shape is None:
+        return {'rows': len(table), 'columns': None}
+    return {'rows': int(shape[0]), 'columns': int(shape[1]) if len(shape) > 1 else 1}
+
+
+class StageRecord:
+    """Measurements of one stage; scripts add shapes and counts while it runs."""
+
+    def __init__(self, name):
+        self.name = name
+        self.data = {'stage': name}
+
+    def input(self, *tables):
+        """Record the shape of the stage's input table(s)."""
+        self.data['input'] = [shape_of(t) for t in tables] if len(tables) > 1 else shape_of(tables[0])
+
+    def output(self, table):
+        """Record the shape of the stage's output table."""
+        self.data['output'] = shape_of(table)
+
+    def merges(self, stats):
+        """Record per-source match counts of a join (see metadata_join.attach)."""
+        self.data.setdefault('merges', {}).update(stats)
+
+    def count(self, **counts):
+        """Record extra named counts."""
+        self.data.setdefault('counts', {}).update(counts)
+
+
+class RunReport:
+    """Collects StageRecords for one script run and writes them as JSON.
+
+    ``args`` is the parsed argparse namespace of the run, recorded as is so
+    the report shows the options the step actually ran with, however it was
+    invoked (script, ``amr-dataset`` or an in-process ``main(argv)``).
+    """
+
+    def __init__(self, script, output_path, profile_stage=None, trace_memory=False, args=None):
+        self.script = script
+        self.output_path = output_path
+        self.args = args
+        self.profile_stage = profile_stage
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        if trace_memory:
+            tracemalloc.start()
+
+    @property
+    def report_path(self):
+        return os.path.splitext(self.output_path)[0] + '.run_report.json'
+
+    def profile_path(self, stage):
+        return f"{os.path.splitext(self.output_path)[0]}.{stage}.prof"
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the enclosed block as stage ``name``; yields its StageRecord."""
+        record = StageRecord(name)
+        per_stage_rss = _reset_peak_rss()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record.data.update({
+                'wall_seconds': round(time.perf_counter() - wall, 4),
+                'cpu_seconds': round(time.process_time() - cpu, 4),
+                'peak_rss_mb': _peak_rss_mb(),
+                'peak_rss_scope': 'stage' if per_stage_rss else 'process',
+            })
+            if self.trace_memory:
+                record.data['tracemalloc_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            if profiler is not None:
+                profiler.dump_stats(self.profile_path(name))
+                record.data['profile'] = self.profile_path(name)
+            self.stages.append(record)
+
+    def to_dict(self):
+        return {
+            'script': self.script,
+            'output': self.output_path,
+            'started': self.started,
+            'args': vars(self.args) if self.args is not None else None,
+            'python': platform.python_version(),
+            'wall_seconds': round(time.perf_counter() - self._wall, 4),
+            'cpu_seconds': round(time.process_time() - self._cpu, 4),
+            'stages': [record.data for record in self.stages],
+        }
+
+    def save(self):
+        """Write the run report next to the output dataset and return its path."""
+        if self.profile_stage and self.profile_stage not in {r.name for r in self.stages}:
+            print(f"Warning: --profile-stage '{self.profile_stage}' matched no stage "
+                  f"(stages: {', '.join(r.name for r in self.stages)})")
+        with open(self.report_path, 'w') as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+        print(f"Run report saved to {self.report_path}")
+        return self.report_path
+
+
+def add_report_arguments(parser):
+    """Add the --profile-stage and --trace-memory options to a script's parser."""
+    parser.add_argument('--profile-stage', help="Run this stage under cProfile and dump the stats next to the output")
+    parser.add_argument('--trace-memory', action='store_true', help="Also record tracemalloc peaks per stage (slower)")
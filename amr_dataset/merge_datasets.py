@@ -0,0 +1,119 @@
+"""Join the encoded dataset with harmonized sample metadata (``amr-dataset merge``)."""
+import argparse
+
+from .amr_io import read_table, write_table
+from .instrumentation import RunReport, add_report_arguments
+from .metadata_join import METADATA_CHUNK_ROWS, attach, index_source, normalize_accessions, read_metadata
+from .metadata_features import add_date_features, standardize_host, standardize_isolation_source
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Merge the encoded AMR dataset with harmonized sample metadata.")
+    parser.add_argument('--input', default='amr_summary_cleaned.csv', help="Encoded AMR dataset")
+    parser.add_argument('--metadata', default='all_filtered_harmonized_metadata.csv', help="Harmonized sample metadata")
+    parser.add_argument('--metadata-chunksize', type=int, default=METADATA_CHUNK_ROWS, help="Metadata rows read at a time")
+    parser.add_argument('--output', default='amr_dataset_final_enriched.csv', help="Enriched dataset (.csv, .parquet or .feather)")
+    parser.add_argument('--workers', type=int, default=1, help="Processes formatting CSV output in row blocks (default: 1)")
+    add_report_arguments(parser)
+    return parser
+
+
+def run(args):
+    """Merge ``args.input`` with ``args.metadata`` into ``args.output``; returns the output shape."""
+    # Stage timings, memory and row counts, saved next to the output
+    report = RunReport('merge_datasets', args.output, profile_stage=args.profile_stage,
+                       trace_memory=args.trace_memory, args=args)
+
+    # Select the most useful metadata columns to add. We don't need everything,
+    # just the fields that provide the most context.
+    metadata_columns_to_keep = [
+        'Isolate_ID',
+        'organism',
+        'strain',
+        'collection_date',
+        'country',
+        'host',
+        'isolation_source',
+        'bioproject',
+        'biosample'
+    ]
+
+    # --- 1. Load Your Datasets ---
+    print("Loading datasets...")
+    with report.stage('load') as stage:
+        # Load the AMR data you've already cleaned
+        amr_df = read_table(args.input, required=['Isolate_ID'])
+        isolate_keys = normalize_accessions(amr_df['Isolate_ID'])
+
+        # Load the rich metadata you just generated - only the columns we keep, streamed in
+        # chunks, and only the rows for our isolates
+        metadata_df, metadata_rows_scanned = read_metadata(args.metadata, 'accession', metadata_columns_to_keep,
+                                                           isolate_keys, chunksize=args.metadata_chunksize)
+        stage.output(amr_df)
+        stage.count(metadata_rows=metadata_rows_scanned, metadata_rows_kept=len(metadata_df))
+
+    # --- 2. Prepare for the Merge ---
+
+    # The column names for the isolate ID might be different. Let's standardize them.
+    # In amr_summary_cleaned.csv it's 'Isolate_ID'.
+    # In all_filtered_harmonized_metadata.csv it's 'accession'.
+    # Let's rename the metadata column to match.
+    metadata_df.rename(columns={'accession': 'Isolate_ID'}, inplace=True)
+
+    # --- 3. Enhanced Metadata Cleaning & Feature Engineering ---
+
+    print("Performing metadata cleaning and feature engineering...")
+
+    with report.stage('feature_engineering') as stage:
+        metadata_subset_df = metadata_df.reindex(columns=metadata_columns_to_keep)
+
+        # Date Engineering: Parse collection_date (each distinct value once) and extract
+        # collection_year, collection_month and collection_season
+        add_date_features(metadata_subset_df)
+
+        # Categorical Standardization for host and isolation_source
+        # (keyword rules live in standardization_rules.json)
+        metadata_subset_df['host_standardized'] = standardize_host(metadata_subset_df['host'])
+        metadata_subset_df['isolation_source_standardized'] = standardize_isolation_source(metadata_subset_df['isolation_source'])
+        stage.output(metadata_subset_df)
+        stage.count(undated_rows=int(metadata_subset_df['collection_year'].isna().sum()))
+
+    # --- 4. Perform the Merge ---
+    # We'll use a 'left' merge. This means we start with the amr_df (our primary data)
+    # and add information from the metadata_subset_df.
+    # If an Isolate_ID from the AMR data doesn't exist in the metadata, the new columns will be empty (NaN).
+    # Accessions are matched without their version, and duplicate metadata rows are reported
+    # instead of duplicating isolates.
+    print("Merging AMR data with enhanced metadata...")
+    with report.stage('merge') as stage:
+        metadata_source = index_source(metadata_subset_df, 'Isolate_ID', metadata_subset_df.columns, 'metadata')
+        final_df, join_stats = attach(amr_df, isolate_keys, [metadata_source])
+        stage.merges(join_stats)
+        stage.output(final_df)
+
+    # --- 5. Save the Final Enriched Dataset ---
+    output_filename = args.output
+    print(f"Saving the final, enriched dataset to '{output_filename}'...")
+    with report.stage('save') as stage:
+        write_table(final_df, output_filename, workers=args.workers)
+        stage.input(final_df)
+    report.save()
+
+    print("\nMerge complete!")
+    print("Final dataset shape:", final_df.shape)
+    print("Enhanced metadata columns added:")
+    print("- collection_year, collection_month, collection_season")
+    print("- host_standardized, isolation_source_standardized")
+    print("\nHere are the first 5 rows of your new master dataset:")
+    print(final_df.head())
+    return final_df.shape
+
+
+def main(argv=None, prog=None):
+    args = build_parser(prog).parse_args(argv)
+    try:
+        run(args)
+    except FileNotFoundError as e:
+        print(f"Error: Make sure '{e.filename}' is in the same directory as the script.")
+        return 1
+    return 0
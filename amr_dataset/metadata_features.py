@@ -0,0 +1,140 @@
+"""Vectorized feature engineering for sample metadata columns.
+
+Collection dates arrive in many shapes ('2019-05-03', '05/03/2019', '2019',
+partial NCBI dates like '2019-05', or placeholders like 'missing'). Each
+distinct raw value is parsed once, trying whole-column format cascades
+before falling back to pandas' automatic parsing, and the results are mapped
+back onto the full column.
+
+Host and isolation source are standardized the same way: the keyword rules in
+``standardization_rules.json`` are compiled into one regex per field, each
+distinct raw value is matched once, and the labels are broadcast back.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Formats tried in order; the first that matches a value wins
+DATE_FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%m/%d/%Y', '%Y', '%Y-%m']
+
+# Placeholder values that mean "no date" and are never parsed
+MISSING_DATES = {'', 'missing', 'not collected', 'not applicable', 'not provided', 'unknown', 'na', 'n/a', 'none'}
+
+SEASONS = {
+    12: 'Winter', 1: 'Winter', 2: 'Winter',
+    3: 'Spring', 4: 'Spring', 5: 'Spring',
+    6: 'Summer', 7: 'Summer', 8: 'Summer',
+    9: 'Fall', 10: 'Fall', 11: 'Fall',
+}
+
+
+def _as_text(value):
+    """String form of a raw date; whole-number floats lose their '.0'."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def parse_dates(series):
+    """Parse a column of mixed-format dates, returning datetime64 with NaT.
+
+    Matches the old per-row ``parse_date``: the fixed formats are tried in
+    order, then pandas' automatic parser, and anything unparseable is NaT.
+    """
+    codes, uniques = pd.factorize(series)
+    text = pd.Series([_as_text(v) for v in uniques], dtype=object)
+    parsed = pd.Series(pd.NaT, index=text.index, dtype='datetime64[ns]')
+
+    remaining = ~text.str.lower().isin(MISSING_DATES)
+    for fmt in DATE_FORMATS:
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(text[remaining], format=fmt, errors='coerce')
+        matched = attempt.notna()
+        parsed[attempt.index[matched]] = attempt[matched]
+        remaining[attempt.index[matched]] = False
+
+    # Free-form leftovers such as 'Jan 2020'; few distinct values reach here
+    for i in text.index[remaining]:
+        try:
+            parsed[i] = pd.to_datetime(text[i])
+        except (ValueError, TypeError, OverflowError):
+            pass
+
+    # Missing values have code -1, which picks the trailing NaT
+    values = np.append(parsed.to_numpy(), np.datetime64('NaT', 'ns'))
+    return pd.Series(values[codes], index=series.index, name=series.name)
+
+
+def season_from_month(months):
+    """Map a month column (1-12, NaN for unknown) to its season name."""
+    return months.map(SEASONS).fillna('Unknown')
+
+
+def add_date_features(df, column='collection_date'):
+    """Parse ``column`` in place and add collection year, month and season."""
+    df[column] = parse_dates(df[column])
+    df['collection_year'] = df[column].dt.year
+    df['collection_month'] = df[column].dt.month
+    df['collection_season'] = season_from_month(df['collection_month'])
+    return df
+
+
+# Keyword rules for host / isolation_source standardization
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'standardization_rules.json')
+
+
+def compile_rules(rules):
+    """Compile ordered ``[category, keywords]`` rules into one regex.
+
+    Each category becomes one alternative of the form ``(?=.*(kw1|kw2))``
+    with a named empty group after it. Alternatives are tried in rule order,
+    so the first category with any keyword anywhere in the value wins,
+    exactly like the old ``if any(term in s ...) / elif ...`` chains.
+    """
+    branches = []
+    for i, (_, keywords) in enumerate(rules):
+        terms = '|'.join(re.escape(k) for k in keywords)
+        branches.append(f'(?=.*?(?:{terms}))(?P<r{i}>)')
+    return re.compile('|'.join(branches), re.DOTALL)
+
+
+@lru_cache(maxsize=None)
+def load_standardizer(field, rules_file=RULES_FILE):
+    """Return ``(pattern, categories, default, missing)`` for a rules field."""
+    with open(rules_file) as handle:
+        spec = json.load(handle)[field]
+    categories = [category for category, _ in spec['rules']]
+    return compile_rules(spec['rules']), categories, spec['default'], spec['missing']
+
+
+def standardize(series, field, rules_file=RULES_FILE):
+    """Map raw metadata values to standard categories using the rule table.
+
+    Values are lower-cased and stripped before matching. Each distinct raw
+    value is classified once and the result is broadcast back to the column;
+    missing values get the field's ``missing`` label.
+    """
+    pattern, categories, default, missing = load_standardizer(field, rules_file)
+    codes, uniques = pd.factorize(series)
+    labels = []
+    for value in uniques:
+        match = pattern.match(str(value).lower().strip())
+        labels.append(categories[int(match.lastgroup[1:])] if match else default)
+    # Missing values have code -1, which picks the trailing missing label
+    labels = np.array(labels + [missing], dtype=object)
+    return pd.Series(labels[codes], index=series.index, name=series.name)
+
+
+def standardize_host(series):
+    """Standardize a host column (Human, Avian, Porcine, Bovine, Environment, Other)."""
+    return standardize(series, 'host')
+
+
+def standardize_isolation_source(series):
+    """Standardize an isolation_source column (Fecal, Blood, Urine, Food, ...)."""
+    return standardize(series, 'isolation_source')
@@ -0,0 +1,156 @@
+"""Key-indexed left joins of narrow metadata sources onto the wide AMR table.
+
+The AMR feature table has hundreds of gene/class columns, while each
+metadata source adds a handful. Instead of one ``pd.merge`` per source (each
+copying the whole wide frame), accessions are normalized once, every source
+is indexed by its normalized key, and each source's narrow block is aligned
+to the isolates with a hash lookup. The aligned blocks are then concatenated
+next to the feature block, which is not copied (Copy-on-Write in pandas 3,
+``copy=False`` before it). A new source costs about its own size.
+
+Sources must have one row per accession. Duplicate keys are reported and the
+first row is kept, so duplicates cannot multiply isolate rows.
+
+Large exports are loaded with read_metadata, which parses only the needed
+columns, in chunks, and drops rows for accessions outside the AMR isolate set
+while reading, so memory follows the isolate count, not the export size.
+"""
+from collections import namedtuple
+
+import pandas as pd
+
+from .amr_io import iter_table, read_columns
+from .amr_schema import apply_schema, require_columns
+
+# Rows of a metadata export held in memory at a time by read_metadata
+METADATA_CHUNK_ROWS = 200_000
+
+# pandas < 3 copies every block in concat unless told not to; pandas 3 never
+# does (Copy-on-Write) and deprecates the keyword
+CONCAT_NO_COPY = {'copy': False} if int(pd.__version__.split('.')[0]) < 3 else {}
+
+# A metadata source indexed by normalized accession (unique keys)
+MetadataSource = namedtuple('MetadataSource', ['name', 'block', 'n_rows', 'duplicate_keys'])
+
+
+class DuplicateKeyError(ValueError):
+    """A metadata source has several rows for one accession."""
+
+
+def normalize_accessions(values):
+    """Version-less, upper-case accession keys, e.g. 'ap039418.1' -> 'AP039418'.
+
+    GenBank (GCA_) and RefSeq (GCF_) assembly accessions of the same assembly
+    map to one key ('GC_000005845'). Missing values stay missing.
+    """
+    values = pd.Series(values, copy=False)
+    keys = values.astype('str').str.strip().str.upper()
+    keys = keys.str.replace(r'\.\d+$', '', regex=True)
+    keys = keys.str.replace(r'^GC[AF]_', 'GC_', regex=True)
+    return keys.where(values.notna())
+
+
+def index_source(df, key_column, columns, name, on_duplicate='first'):
+    """Index the ``columns`` of a metadata table by normalized ``key_column``.
+
+    Columns missing from ``df`` are added empty (like ``DataFrame.reindex``).
+    Duplicate keys are reported and their first row kept, or raise
+    DuplicateKeyError with ``on_duplicate='error'``.
+    """
+    keys = normalize_accessions(df[key_column])
+    block = df.reindex(columns=[col for col in columns if col != key_column])
+    block.index = pd.Index(keys, name='accession_key')
+    block = block[keys.notna().to_numpy()]
+    duplicated = block.index.duplicated(keep='first')
+    n_duplicates = int(duplicated.sum())
+    if n_duplicates:
+        examples = ', '.join(block.index[duplicated].unique()[:5])
+        message = f"{name}: {n_duplicates} rows share an accession with an earlier row (e.g. {examples})"
+        if on_duplicate == 'error':
+            raise DuplicateKeyError(message)
+        print(f"Warning: {message}; keeping the first row of each")
+        block = block[~duplicated]
+    return MetadataSource(name, block, len(df), n_duplicates)
+
+
+def unify_join_dtypes(sources, keys):
+    """Cast source columns to the dtype a left join onto all of ``keys`` gives them.
+
+    A join leaves unmatched rows missing, which turns e.g. an int64 column
+    into float64, but only if some key is unmatched. Joining chunks of
+    ``keys`` one at a time would then give chunks of different dtypes;
+    after this, every chunk gets the dtype of a single full join.
+    """
+    keys = pd.Index(keys)
+    unified = []
+    for source in sources:
+        if (source.block.index.get_indexer(keys) >= 0).all():
+            unified.append(source)
+            continue
+        block = source.block.astype({
+            col: pd.api.extensions.take(source.block[col].array, [-1], allow_fill=True).dtype
+            for col in source.block.columns})
+        unified.append(source._replace(block=block))
+    return unified
+
+
+def attach(features, keys, sources):
+    """Left-join each source's block onto ``features`` by the aligned ``keys``.
+
+    ``keys`` holds the normalized accession of each row of ``features``.
+    Returns ``(joined, stats)``; rows keep their order and count, and
+    ``stats`` maps each source name to its match counts.
+    """
+    keys = pd.Index(keys)
+    blocks = [features]
+    stats = {}
+    taken = set(features.columns)
+    for source in sources:
+        clash = taken & set(source.block.columns)
+        if clash:
+            raise ValueError(f"{source.name}: columns already present: {', '.join(sorted(map(str, clash)))}")
+        taken |= set(source.block.columns)
+        # One hash lookup per row; -1 (no match) becomes a missing value
+        positions = source.block.index.get_indexer(keys)
+        aligned = pd.DataFrame({col: pd.api.extensions.take(source.block[col].array, positions, allow_fill=True)
+                                for col in source.block.columns}, index=features.index)
+        blocks.append(aligned)
+        matched = int((positions >= 0).sum())
+        stats[source.name] = {
+            'left_rows': len(features),
+            'right_rows': source.n_rows,
+            'matched_rows': matched,
+            'unmatched_rows': len(features) - matched,
+            'right_duplicate_keys': source.duplicate_keys,
+            'result_rows': len(features),
+        }
+    return pd.concat(blocks, axis=1, **CONCAT_NO_COPY), stats
+
+
+def read_metadata(path, key_column, columns, keys, chunksize=METADATA_CHUNK_ROWS):
+    """Stream a metadata export, keeping only ``columns`` and rows whose key is in ``keys``.
+
+    NCBI exports can be far larger than the AMR table: only the listed
+    columns are parsed (those the file lacks are skipped, and index_source
+    adds them empty), ``chunksize`` rows are held at a time, and each chunk
+    is filtered by normalized accession before it is kept. Rows keep their
+    file order, so duplicate handling is unchanged. Returns
+    ``(metadata, rows_scanned)``.
+    """
+    available = set(read_columns(path))
+    require_columns(available, [key_column], path)
+    wanted = [key_column] + [col for col in columns if col != key_column and col in available]
+    keys = set(pd.Index(keys).dropna())
+    kept = []
+    rows_scanned = 0
+    # Accessions are always read as text, whatever they look like
+    for chunk in iter_table(path, columns=wanted, chunksize=chunksize, dtype={key_column: 'str'}):
+        rows_scanned += len(chunk)
+        chunk = chunk[normalize_accessions(chunk[key_column]).isin(keys).to_numpy()]
+        if len(chunk):
+            kept.append(chunk)
+    if not kept:
+        return pd.DataFrame(columns=wanted), rows_scanned
+    # Chunks may infer different categories/dtypes; re-apply the schema to the result
+    metadata = apply_schema(pd.concat(kept, ignore_index=True), path, skip={key_column})
+    return metadata, rows_scanned
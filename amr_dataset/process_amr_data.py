@@ -0,0 +1,220 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .abricate_parser import NO_FILTER, HitFilter, Profile, parse_combined_report, parse_report, parse_summary_report
+from .amr_io import write_table
+from .amr_schema import ASSEMBLY_COLUMNS
+from .genome_stats import assembly_stats, gc_percent, scan_fasta
+from .ingest_manifest import file_stat, load_manifest, same_content, same_stat, save_manifest, with_hash
+from .resistance_index import ResistanceIndex
+
+# Define directories
+input_dir = "Genome Extractor Run"
+results_dir = "ABRicate Run"
+output_file = "amr_summary_dataset.csv"
+manifest_file = "amr_ingest_manifest.json"
+
+# Per-isolate genome columns, all computed in one read of the FASTA
+GENOME_COLUMNS = ['Genome_Length_BP', 'GC_Content_Percent'] + ASSEMBLY_COLUMNS
+OUTPUT_COLUMNS = ['Isolate_ID'] + GENOME_COLUMNS + ['AMR_Gene_Profile', 'Drug_Resistance_Phenotype']
+
+
+def find_fasta(fasta_dir, isolate_id):
+    """Return the genome FASTA path for an isolate, or None if missing."""
+    for ext in ('.fasta', '.fasta.gz'):
+        path = os.path.join(fasta_dir, isolate_id + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def genome_stats(fasta_dir, isolate_id):
+    """Genome length, GC content and assembly statistics of an isolate, keyed by
+    GENOME_COLUMNS, or Nones if its FASTA is missing."""
+    fasta_file = find_fasta(fasta_dir, isolate_id)
+    if fasta_file is None:
+        print(f"Warning: FASTA file for {isolate_id} not found.")
+        return dict.fromkeys(GENOME_COLUMNS)
+    stats = scan_fasta(fasta_file)
+    assembly = assembly_stats(stats)
+    return {
+        'Genome_Length_BP': stats['length'],
+        'GC_Content_Percent': gc_percent(stats),
+        'Contig_Count': assembly['contigs'],
+        'Largest_Contig_BP': assembly['largest_contig'],
+        'N50_BP': assembly['n50'],
+        'L50': assembly['l50'],
+        'Ambiguous_Base_Fraction': assembly['ambiguous_fraction'],
+        'Contig_GC_SD': assembly['contig_gc_sd'],
+    }
+
+
+def _process_isolate_safe(task):
+    """Worker entry point: return ``(entry, None)`` or ``(None, error)``.
+
+    ``entry`` is the isolate's manifest entry: the computed row, its gene ->
+    class links and the signatures of its input files (hashed only when
+    ``track`` is set). Each half of the row is reused from the ``cached``
+    entry when its file's contents still match: the gene profile and links
+    when the report is unchanged, the genome stats when the FASTA is.
+    ``profile`` is given instead of a report path when the isolate comes from
+    a combined or summary report.
+    """
+    isolate_id, tsv_path, profile, fasta_dir, hit_filter, cached, track = task
+    try:
+        tsv_sig = file_stat(tsv_path)
+        fasta_sig = file_stat(find_fasta(fasta_dir, isolate_id))
+        if track:
+            tsv_sig = with_hash(tsv_sig, cached and cached['tsv'])
+            fasta_sig = with_hash(fasta_sig, cached and cached['fasta'])
+        row = cached['row'] if cached is not None else None
+        if profile is None:
+            if row is not None and tsv_sig is not None and same_content(tsv_sig, cached['tsv']):
+                profile = Profile(row['AMR_Gene_Profile'], row['Drug_Resistance_Phenotype'], cached['links'])
+            else:
+                profile = parse_report(tsv_path, hit_filter)
+        if row is not None and same_content(fasta_sig, cached['fasta']):
+            stats = {col: row[col] for col in GENOME_COLUMNS}
+        else:
+            stats = genome_stats(fasta_dir, isolate_id)
+        record = {
+            'Isolate_ID': isolate_id,
+            **stats,
+            'AMR_Gene_Profile': profile.genes,
+            'Drug_Resistance_Phenotype': profile.resistances
+        }
+        return {'tsv': tsv_sig, 'fasta': fasta_sig, 'row': record, 'links': profile.links}, None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def list_isolate_reports(results_dir):
+    """Return the ABRicate .tsv reports in ``results_dir`` in a stable order."""
+    return sorted(f for f in os.listdir(results_dir) if f.endswith('.tsv'))
+
+
+def process_all(results_dir, fasta_dir, workers=1, chunksize=16, manifest=None, hit_filter=NO_FILTER, profiles=None):
+    """Process every isolate report, serially or across a process pool.
+
+    Rows are returned in report filename (or Isolate_ID) order regardless of
+    ``workers``, so serial and parallel runs produce identical output. Isolates that fail
+    are reported and left out instead of aborting the run.
+
+    ``profiles`` optionally maps Isolate_ID -> Profile parsed
+    from a combined or summary report; the isolates are then taken from it
+    and ``results_dir`` is not read.
+
+    ``manifest`` is a dict of cached entries from a previous run (see
+    ingest_manifest), or None to disable caching. Isolates whose files are
+    unchanged reuse their cached row without being re-read. Returns
+    ``(rows, failures, entries)`` where ``entries`` is the updated manifest,
+    holding only the isolates present in this run.
+    """
+    if profiles is None:
+        isolates = [(report[:-4], os.path.join(results_dir, report), None) for report in list_isolate_reports(results_dir)]
+    else:
+        isolates = [(isolate_id, None, profiles[isolate_id]) for isolate_id in sorted(profiles)]
+    track = manifest is not None
+
+    rows = [None] * len(isolates)
+    entries = {}
+    tasks = []
+    positions = []
+    for i, (isolate_id, tsv_path, profile) in enumerate(isolates):
+        cached = manifest.get(isolate_id) if track else None
+        if (cached is not None and profile is None
+                and same_stat(file_stat(tsv_path), cached['tsv'])
+                and same_stat(file_stat(find_fasta(fasta_dir, isolate_id)), cached['fasta'])):
+            entries[isolate_id] = cached
+            rows[i] = cached['row']
+            continue
+        tasks.append((isolate_id, tsv_path, profile, fasta_dir, hit_filter, cached, track))
+        positions.append(i)
+
+    if track and profiles is None:
+        print(f"Reusing {len(isolates) - len(tasks)} cached isolates, processing {len(tasks)}")
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() yields results in submission order
+            results = list(pool.map(_process_isolate_safe, tasks, chunksize=chunksize))
+    else:
+        results = [_process_isolate_safe(task) for task in tasks]
+
+    failures = []
+    for i, (entry, error) in zip(positions, results):
+        isolate_id = isolates[i][0]
+        if error is not None:
+            print(f"Warning: skipping {isolate_id}: {error}")
+            failures.append((isolate_id, error))
+        else:
+            entries[isolate_id] = entry
+            rows[i] = entry['row']
+
+    data = [row for row in rows if row is not None]
+    return data, failures, entries
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Summarise ABRicate reports and genome FASTA files per isolate.")
+    parser.add_argument('--results-dir', default=results_dir, help="Directory of ABRicate .tsv reports")
+    parser.add_argument('--combined-report', help="Single multi-sample ABRicate report to read instead of --results-dir")
+    parser.add_argument('--summary-report', help="'abricate --summary' table to read instead of --results-dir (genes only, no resistance classes)")
+    parser.add_argument('--genomes-dir', default=input_dir, help="Directory of genome .fasta files")
+    parser.add_argument('--output', default=output_file, help="Output summary dataset (.csv, .parquet or .feather)")
+    parser.add_argument('--min-coverage', type=float, default=0.0, help="Ignore hits below this %%COVERAGE")
+    parser.add_argument('--min-identity', type=float, default=0.0, help="Ignore hits below this %%IDENTITY")
+    parser.add_argument('--databases', nargs='+', help="Only count hits from these ABRicate databases (e.g. card resfinder)")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes (default: 1, serial)")
+    parser.add_argument('--resistance-index', help="Also save the gene <-> resistance class <-> isolate index (.npz) here")
+    parser.add_argument('--manifest', default=manifest_file, help="Per-isolate cache used to skip unchanged isolates")
+    parser.add_argument('--no-cache', action='store_true', help="Reprocess every isolate and do not read or write the manifest")
+    args = parser.parse_args(argv)
+
+    if args.combined_report and args.summary_report:
+        parser.error("--combined-report and --summary-report are mutually exclusive")
+
+    hit_filter = NO_FILTER
+    if args.min_coverage or args.min_identity or args.databases:
+        hit_filter = HitFilter(args.min_coverage, args.min_identity, frozenset(args.databases) if args.databases else None)
+
+    profiles = None
+    if args.combined_report:
+        profiles = parse_combined_report(args.combined_report, hit_filter)
+        print(f"Read {len(profiles)} isolates from {args.combined_report}")
+    elif args.summary_report:
+        if args.min_identity or args.databases:
+            print("Warning: summary reports only carry %COVERAGE; --min-identity and --databases are ignored.")
+        profiles = parse_summary_report(args.summary_report, args.min_coverage)
+        print(f"Read {len(profiles)} isolates from {args.summary_report}")
+
+    # Thresholds change the gene profiles, so cached rows are only valid for the same ones
+    settings = {'min_coverage': hit_filter.min_coverage, 'min_identity': hit_filter.min_identity,
+                'databases': sorted(hit_filter.databases) if hit_filter.databases else None}
+    manifest = None if args.no_cache else load_manifest(args.manifest, settings)
+    data, failures, entries = process_all(args.results_dir, args.genomes_dir, workers=args.workers, manifest=manifest,
+                                          hit_filter=hit_filter, profiles=profiles)
+    if not args.no_cache:
+        save_manifest(args.manifest, entries, settings)
+
+    # Create final DataFrame and save to CSV
+    df_final = pd.DataFrame(data, columns=OUTPUT_COLUMNS)
+    write_table(df_final, args.output)
+
+    # Gene -> class links of each isolate, kept by the parser (and the manifest)
+    if args.resistance_index:
+        index = ResistanceIndex.build(df_final['Isolate_ID'], df_final['AMR_Gene_Profile'],
+                                      df_final['Drug_Resistance_Phenotype'],
+                                      [entries[isolate_id]['links'] for isolate_id in df_final['Isolate_ID']])
+        index.save(args.resistance_index)
+        print(f"Resistance index saved to {args.resistance_index} ({index.counts()['links']} gene -> class links)")
+
+    print(f"Processed {len(data)} isolates into {args.output}")
+    if failures:
+        print(f"{len(failures)} isolates failed:")
+        for isolate_id, error in failures:
+            print(f"  {isolate_id}: {error}")
+    return 0
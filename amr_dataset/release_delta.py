@@ -0,0 +1,375 @@
+"""Row/column delta files between two releases of the master dataset.
+
+``diff`` compares a new release with the previous one by ``Isolate_ID`` and
+column set and writes a delta directory; ``apply`` rebuilds the new release
+from the previous one and that directory. Consumers then only download the
+isolates that were added or changed and the columns that were added.
+
+Both releases are streamed in chunks. Each row is reduced to a 64-bit hash
+in batches (the gene_/class_ flags are bit-packed and hashed as words, the
+other columns with pandas' vectorized hashing), so the comparison holds one
+hash per previous-release row in memory, not the matrix. CSV releases are
+read as text, which keeps the comparison exact and makes ``apply``
+reproduce the new CSV byte for byte.
+
+A delta directory holds:
+
+- ``delta.json``: column lists, row counts and a fingerprint of each release
+- ``changes``: Isolate_ID, change (added/changed/moved/removed) and the
+  row of the isolate in the new release (-1 for removed isolates)
+- ``upserts``: full new-release rows of the added, changed and moved isolates
+- ``added_columns``: Isolate_ID and the added columns for all other isolates
+
+Rows kept from the previous release must stay in their old relative order;
+those that do not are stored as ``moved`` (greedily, so a large reshuffle
+gives a delta close to the full release). The delta tables use ``.csv.gz``
+for CSV releases and the release's own format otherwise.
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .amr_io import TableWriter, iter_table, read_columns, table_format, to_plain, write_table
+from .amr_schema import SchemaError, is_flag_name, require_columns
+from .instrumentation import RunReport, add_report_arguments
+
+KEY = 'Isolate_ID'
+DELTA_VERSION = 1
+MANIFEST = 'delta.json'
+DELTA_TABLES = ('changes', 'upserts', 'added_columns')
+
+# Rows of a release held in memory at a time
+DELTA_CHUNK_ROWS = 100_000
+
+# Fixed seed of the per-word weights of the flag hash, so hashes are stable across runs
+HASH_SEED = 20240501
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def delta_extension(release_path):
+    """Extension of the delta tables for a release file."""
+    if table_format(release_path) == 'csv':
+        return '.csv.gz'
+    return os.path.splitext(release_path)[1].lower()
+
+
+def delta_paths(delta_dir, extension):
+    return {name: os.path.join(delta_dir, name + extension) for name in DELTA_TABLES}
+
+
+def iter_release(path, chunksize=DELTA_CHUNK_ROWS):
+    """Yield a release in chunks, flags as uint8 and (for CSV) every other column as text."""
+    if table_format(path) == 'csv':
+        text = {col: 'str' for col in read_columns(path) if not is_flag_name(col)}
+        chunks = iter_table(path, chunksize=chunksize, dtype=text, keep_default_na=False)
+    else:
+        chunks = iter_table(path, chunksize=chunksize)
+    for chunk in chunks:
+        yield to_plain(chunk)
+
+
+def _combine(first, second):
+    return (first * HASH_MULTIPLIER) ^ second
+
+
+def row_hashes(frame):
+    """One uint64 hash per row of ``frame``, over its columns in order."""
+    flags = [col for col in frame.columns if is_flag_name(col) and frame[col].dtype == np.uint8]
+    others = [col for col in frame.columns if col not in set(flags)]
+    hashes = np.zeros(len(frame), dtype=np.uint64)
+    if flags:
+        # 0/1 flags packed 64 to a word; each word is mixed, then weighted by its position
+        bits = np.packbits(frame[flags].to_numpy(dtype=np.uint8), axis=1)
+        bits = np.pad(bits, ((0, 0), (0, -bits.shape[1] % 8)))
+        words = np.ascontiguousarray(bits).view('<u8')
+        mixed = pd.util.hash_array(words.ravel()).reshape(words.shape)
+        weights = np.random.default_rng(HASH_SEED).integers(0, 2**64, size=words.shape[1], dtype=np.uint64) | np.uint64(1)
+        hashes = (mixed * weights).sum(axis=1, dtype=np.uint64)
+    if others:
+        hashes = _combine(hashes, pd.util.hash_pandas_object(frame[others], index=False).to_numpy())
+    return hashes
+
+
+def release_hashes(frame, compared, extra):
+    """``(compared_hashes, full_hashes)``: over Isolate_ID and the shared columns, and over all columns."""
+    compared_hashes = row_hashes(frame[[KEY] + compared])
+    full_hashes = _combine(compared_hashes, row_hashes(frame[extra])) if extra else compared_hashes
+    return compared_hashes, full_hashes
+
+
+def _fingerprint(columns):
+    digest = hashlib.sha256()
+    digest.update('\x1f'.join(map(str, columns)).encode())
+    return digest
+
+
+def _clear_delta(delta_dir):
+    """Remove delta tables of an earlier run, so stale files are never applied."""
+    for name in os.listdir(delta_dir):
+        if name == MANIFEST or name.split('.')[0] in DELTA_TABLES:
+            os.remove(os.path.join(delta_dir, name))
+
+
+class _RowStream:
+    """Hands out the rows of a chunked table ``n`` at a time, in order."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = None
+
+    def take(self, n):
+        pieces = []
+        while n > 0:
+            if self._buffer is None or not len(self._buffer):
+                self._buffer = next(self._chunks, None)
+                if self._buffer is None:
+                    raise ValueError("delta table ended before all its rows were used")
+            piece = self._buffer.iloc[:n]
+            self._buffer = self._buffer.iloc[n:]
+            pieces.append(piece)
+            n -= len(piece)
+        return pd.concat(pieces, ignore_index=True) if pieces else None
+
+
+def diff_releases(old_path, new_path, delta_dir, chunksize=DELTA_CHUNK_ROWS, report=None):
+    """Write the delta from release ``old_path`` to ``new_path`` into ``delta_dir``; returns the manifest."""
+    report = report or RunReport('release_delta diff', delta_dir)
+    old_columns, new_columns = read_columns(old_path), read_columns(new_path)
+    require_columns(old_columns, [KEY], old_path)
+    require_columns(new_columns, [KEY], new_path)
+    compared = [col for col in new_columns if col in set(old_columns) and col != KEY]
+    added_columns = [col for col in new_columns if col not in set(old_columns)]
+    removed_columns = [col for col in old_columns if col not in set(new_columns)]
+    extension = delta_extension(new_path)
+    paths = delta_paths(delta_dir, extension)
+    os.makedirs(delta_dir, exist_ok=True)
+    _clear_delta(delta_dir)
+
+    # --- 1. Hash the previous release ---
+    print(f"Hashing rows of the previous release '{old_path}'...")
+    old_ids, old_hashes = [], []
+    old_fingerprint = _fingerprint(old_columns)
+    with report.stage('hash_old') as stage:
+        for chunk in iter_release(old_path, chunksize):
+            compared_hashes, full_hashes = release_hashes(chunk, compared, removed_columns)
+            old_ids.append(chunk[KEY].to_numpy(dtype=object))
+            old_hashes.append(compared_hashes)
+            old_fingerprint.update(full_hashes.tobytes())
+        old_index = pd.Index(np.concatenate(old_ids) if old_ids else [], dtype=object)
+        old_hashes = np.concatenate(old_hashes) if old_hashes else np.zeros(0, dtype=np.uint64)
+        if not old_index.is_unique:
+            raise ValueError(f"{old_path}: duplicate {KEY} values, e.g. {', '.join(map(str, old_index[old_index.duplicated()][:5]))}")
+        stage.output((len(old_index), len(old_columns)))
+    del old_ids
+
+    # --- 2. Stream the new release against the hashes ---
+    print(f"Comparing the new release '{new_path}'...")
+    seen = np.zeros(len(old_index), dtype=bool)
+    new_fingerprint = _fingerprint(new_columns)
+    changed_ids, changed_kinds, changed_rows = [], [], []
+    # Highest previous-release row kept so far; kept rows must keep their old order
+    last_kept = -1
+    n_new = 0
+    counts = dict.fromkeys(['added', 'changed', 'moved', 'unchanged', 'removed'], 0)
+    with report.stage('compare_new') as stage, TableWriter(paths['upserts']) as upserts, \
+            TableWriter(paths['added_columns']) as added:
+        for chunk in iter_release(new_path, chunksize):
+            compared_hashes, full_hashes = release_hashes(chunk, compared, added_columns)
+            new_fingerprint.update(full_hashes.tobytes())
+            positions = old_index.get_indexer(chunk[KEY].to_numpy(dtype=object))
+            matched = positions >= 0
+            matched_positions = positions[matched]
+            if seen[matched_positions].any() or len(np.unique(matched_positions)) < len(matched_positions):
+                raise ValueError(f"{new_path}: an {KEY} occurs more than once")
+            seen[matched_positions] = True
+
+            same = matched.copy()
+            same[matched] = compared_hashes[matched] == old_hashes[matched_positions]
+            candidates = positions[same]
+            running = np.maximum.accumulate(np.concatenate([[last_kept], candidates]))[1:]
+            in_order = candidates == running
+            if len(candidates):
+                last_kept = int(running[-1])
+            kept = same.copy()
+            kept[np.flatnonzero(same)[~in_order]] = False
+
+            upserted = ~kept
+            kinds = np.where(~matched, 'added', np.where(same, 'moved', 'changed'))[upserted]
+            changed_ids.append(chunk[KEY].to_numpy(dtype=object)[upserted])
+            changed_kinds.append(kinds)
+            changed_rows.append(n_new + np.flatnonzero(upserted))
+            for kind in ('added', 'changed', 'moved'):
+                counts[kind] += int((kinds == kind).sum())
+            counts['unchanged'] += int(kept.sum())
+            if upserted.any():
+                upserts.write(chunk[upserted])
+            if added_columns and kept.any():
+                added.write(chunk.loc[kept, [KEY] + added_columns])
+            n_new += len(chunk)
+
+        removed_ids = old_index[~seen].to_numpy(dtype=object)
+        counts['removed'] = len(removed_ids)
+        changes = pd.DataFrame({
+            KEY: np.concatenate(changed_ids + [removed_ids]),
+            'change': np.concatenate(changed_kinds + [np.full(len(removed_ids), 'removed')]),
+            'new_row': np.concatenate(changed_rows + [np.full(len(removed_ids), -1)]).astype(np.int64),
+        })
+        if not changes.loc[changes['change'] == 'added', KEY].is_unique:
+            raise ValueError(f"{new_path}: an {KEY} occurs more than once")
+        write_table(changes, paths['changes'])
+        stage.output((n_new, len(new_columns)))
+        stage.count(**{f'{kind}_rows': n for kind, n in counts.items()},
+                    added_columns=len(added_columns), removed_columns=len(removed_columns))
+
+    manifest = {
+        'version': DELTA_VERSION,
+        'key': KEY,
+        'old': {'path': old_path, 'rows': len(old_index), 'columns': old_columns,
+                'fingerprint': old_fingerprint.hexdigest()},
+        'new': {'path': new_path, 'rows': n_new, 'columns': new_columns,
+                'fingerprint': new_fingerprint.hexdigest()},
+        'added_columns': added_columns,
+        'removed_columns': removed_columns,
+        'rows': counts,
+        'files': {name: os.path.basename(path) for name, path in paths.items() if os.path.exists(path)},
+    }
+    with open(os.path.join(delta_dir, MANIFEST), 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def load_manifest(delta_dir):
+    with open(os.path.join(delta_dir, MANIFEST)) as handle:
+        manifest = json.load(handle)
+    if manifest.get('version') != DELTA_VERSION:
+        raise ValueError(f"{delta_dir}: unsupported delta version {manifest.get('version')}")
+    return manifest
+
+
+def apply_delta(old_path, delta_dir, output, chunksize=DELTA_CHUNK_ROWS, report=None):
+    """Rebuild the new release from ``old_path`` and a delta directory into ``output``.
+
+    The previous release must be the one the delta was made from, and the
+    result must match the new release's fingerprint; otherwise ValueError
+    is raised and ``output`` is removed.
+    """
+    report = report or RunReport('release_delta apply', output)
+    manifest = load_manifest(delta_dir)
+    if read_columns(old_path) != manifest['old']['columns']:
+        raise ValueError(f"{old_path}: columns differ from the release the delta was made from ({manifest['old']['path']})")
+    new_columns = manifest['new']['columns']
+    added_columns, removed_columns = manifest['added_columns'], manifest['removed_columns']
+    compared = [col for col in new_columns if col not in set(added_columns) and col != KEY]
+    files = {name: os.path.join(delta_dir, filename) for name, filename in manifest['files'].items()}
+
+    def stream(name):
+        return _RowStream(iter_release(files[name], chunksize) if name in files else [])
+
+    changes = pd.concat(list(iter_release(files['changes'], chunksize)), ignore_index=True)
+    dropped = set(changes[KEY])
+    upsert_rows = np.sort(changes['new_row'].astype(np.int64).to_numpy())
+    upsert_rows = upsert_rows[upsert_rows >= 0]
+    n_new = manifest['new']['rows']
+    # New-release rows of the kept isolates, in their (unchanged) order
+    kept_rows = np.setdiff1d(np.arange(n_new), upsert_rows, assume_unique=True)
+    upserts, added = stream('upserts'), stream('added_columns')
+
+    old_fingerprint, new_fingerprint = _fingerprint(manifest['old']['columns']), _fingerprint(new_columns)
+    n_old = n_kept = n_upserted = 0
+    with report.stage('apply') as stage, TableWriter(output) as writer:
+        def emit(frame):
+            new_fingerprint.update(release_hashes(frame, compared, added_columns)[1].tobytes())
+            writer.write(frame)
+
+        for chunk in iter_release(old_path, chunksize):
+            old_fingerprint.update(release_hashes(chunk, compared, removed_columns)[1].tobytes())
+            n_old += len(chunk)
+            kept = chunk[~chunk[KEY].isin(dropped).to_numpy()].reset_index(drop=True)
+            if added_columns and len(kept):
+                block = added.take(len(kept))
+                if not (block[KEY].to_numpy() == kept[KEY].to_numpy()).all():
+                    raise ValueError(f"{delta_dir}: added_columns does not line up with {old_path}")
+                kept = pd.concat([kept, block[added_columns]], axis=1)
+            kept = kept.reindex(columns=new_columns)
+            positions = kept_rows[n_kept:n_kept + len(kept)]
+            n_kept += len(kept)
+
+            # Upserted rows that come before the next kept row go in between
+            next_kept = kept_rows[n_kept] if n_kept < len(kept_rows) else n_new
+            n_between = int(np.searchsorted(upsert_rows, next_kept)) - n_upserted
+            between = upserts.take(n_between)
+            if between is not None:
+                if len(kept):
+                    order = np.argsort(np.concatenate([positions, upsert_rows[n_upserted:n_upserted + n_between]]), kind='stable')
+                    kept = pd.concat([kept, between[new_columns]], ignore_index=True).iloc[order]
+                else:
+                    # Concatenating the empty, reindexed chunk would turn added flag columns into floats
+                    kept = between[new_columns]
+                n_upserted += n_between
+            if len(kept):
+                emit(kept)
+
+        rest = upserts.take(len(upsert_rows) - n_upserted)
+        if rest is not None:
+            emit(rest[new_columns])
+        if not n_new:
+            # An empty release still gets its header
+            writer.write(pd.DataFrame(columns=new_columns))
+        stage.output((n_new, len(new_columns)))
+        stage.count(previous_rows=n_old, kept_rows=n_kept, upserted_rows=len(upsert_rows))
+
+    problem = None
+    if n_old != manifest['old']['rows'] or old_fingerprint.hexdigest() != manifest['old']['fingerprint']:
+        problem = f"{old_path} is not the release the delta was made from ({manifest['old']['path']})"
+    elif new_fingerprint.hexdigest() != manifest['new']['fingerprint']:
+        problem = f"the rebuilt release does not match {manifest['new']['path']}"
+    if problem:
+        os.remove(output)
+        raise ValueError(problem)
+    return manifest
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Write or apply row/column delta files between master dataset releases.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    diff_cmd = commands.add_parser('diff', help="Write the delta from the previous release to a new one")
+    diff_cmd.add_argument('--old', required=True, help="Previous release (e.g. Kaggle_AMR_Dataset_v1.0.csv)")
+    diff_cmd.add_argument('--new', required=True, help="New master dataset")
+    diff_cmd.add_argument('--output', required=True, help="Delta directory to write")
+
+    apply_cmd = commands.add_parser('apply', help="Bring the previous release up to date with a delta")
+    apply_cmd.add_argument('--old', required=True, help="Previous release the delta was made from")
+    apply_cmd.add_argument('--delta', required=True, help="Delta directory written by 'diff'")
+    apply_cmd.add_argument('--output', required=True, help="Where to write the updated release")
+
+    for command in (diff_cmd, apply_cmd):
+        command.add_argument('--chunksize', type=int, default=DELTA_CHUNK_ROWS, help="Rows read at a time")
+        add_report_arguments(command)
+    args = parser.parse_args(argv)
+
+    report = RunReport(f'release_delta {args.command}', args.output, profile_stage=args.profile_stage,
+                       trace_memory=args.trace_memory, args=args)
+    try:
+        if args.command == 'diff':
+            manifest = diff_releases(args.old, args.new, args.output, args.chunksize, report)
+            rows = manifest['rows']
+            print(f"Delta saved to {args.output}: {rows['added']} added, {rows['changed']} changed, "
+                  f"{rows['moved']} moved, {rows['removed']} removed, {rows['unchanged']} unchanged rows; "
+                  f"{len(manifest['added_columns'])} added and {len(manifest['removed_columns'])} removed columns")
+        else:
+            manifest = apply_delta(args.old, args.delta, args.output, args.chunksize, report)
+            print(f"Updated release saved to {args.output} ({manifest['new']['rows']} rows, "
+                  f"{len(manifest['new']['columns'])} columns, fingerprint verified)")
+    except FileNotFoundError as e:
+        print(f"Error: '{e.filename}' not found.")
+        return 1
+    except (SchemaError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    report.save()
+    return 0
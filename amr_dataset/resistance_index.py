@@ -0,0 +1,261 @@
+"""Integer-coded gene <-> resistance class <-> isolate index.
+
+The summary dataset keeps each isolate's genes and resistance classes as two
+flat lists, which loses which gene confers which class. process_amr_data.py
+(``--resistance-index``) keeps the gene -> class link of every accepted
+ABRicate hit and saves everything here as compact integer arrays in one
+``.npz``. Isolates, genes and classes are coded by their position in the
+sorted ``isolate_ids``, ``genes`` and ``classes`` arrays, and:
+
+- ``gene_indptr`` / ``gene_indices``: genes of each isolate (CSR)
+- ``class_indptr`` / ``class_isolates``: isolates with each class (inverted)
+- ``link_indptr`` / ``link_genes`` / ``link_classes``: the (gene, class)
+  links of each isolate (CSR, sorted)
+
+Queries are array slices and bincounts over these, answered in milliseconds
+instead of by re-reading the reports.
+
+Examples:
+    amr-dataset resistance isolates carbapenem                 # isolates resistant to a class
+    amr-dataset resistance genes AP039418.1                    # class -> genes of one isolate
+    amr-dataset resistance genes AP039418.1 --class carbapenem
+    amr-dataset resistance drivers carbapenem --top 10         # genes behind a class, collection-wide
+    amr-dataset resistance prevalence --metadata Kaggle_AMR_Dataset_v1.0_final.csv --by country collection_year
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from .amr_encoding import encode_lists
+
+
+def _code_dtype(n):
+    """Smallest unsigned dtype holding the codes 0..n-1."""
+    return np.uint16 if n <= np.iinfo(np.uint16).max else np.uint32
+
+
+class ResistanceIndex:
+    """Gene, class and gene -> class link arrays of a set of isolates (see module docstring)."""
+
+    ARRAYS = ['isolate_ids', 'genes', 'classes', 'gene_indptr', 'gene_indices', 'class_indptr', 'class_isolates',
+              'link_indptr', 'link_genes', 'link_classes']
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self._isolate_pos = None
+        self._class_pos = None
+
+    @classmethod
+    def build(cls, isolate_ids, gene_profiles, class_profiles, links):
+        """Index isolates from their gene/class lists and per-isolate ``[gene, class]`` links.
+
+        ``gene_profiles`` and ``class_profiles`` are semicolon-separated lists
+        as in the summary dataset; ``links`` holds each isolate's pairs.
+        """
+        isolate_ids = list(isolate_ids)
+        n_isolates = len(isolate_ids)
+        gene_matrix = encode_lists(pd.Series(list(gene_profiles), dtype=object))
+        class_matrix = encode_lists(pd.Series(list(class_profiles), dtype=object))
+        genes, classes = gene_matrix.columns, class_matrix.columns
+
+        # Inverted class lists: the class CSR transposed (stable, so isolates stay sorted)
+        class_rows = np.repeat(np.arange(n_isolates), np.diff(class_matrix.indptr))
+        order = np.argsort(class_matrix.indices, kind='stable')
+        class_indptr = np.zeros(len(classes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(class_matrix.indices, minlength=len(classes)), out=class_indptr[1:])
+
+        # Links, coded against the same vocabularies and sorted by (isolate, gene, class)
+        lengths = np.array([len(pairs) for pairs in links], dtype=np.int64)
+        pairs = [pair for isolate_pairs in links for pair in isolate_pairs]
+        link_rows = np.repeat(np.arange(n_isolates), lengths)
+        link_genes = pd.Categorical([g for g, _ in pairs], categories=genes).codes.astype(np.int64)
+        link_classes = pd.Categorical([c for _, c in pairs], categories=classes).codes.astype(np.int64)
+        known = (link_genes >= 0) & (link_classes >= 0)
+        link_rows, link_genes, link_classes = link_rows[known], link_genes[known], link_classes[known]
+        keys = np.unique((link_rows * max(len(genes), 1) + link_genes) * max(len(classes), 1) + link_classes)
+        link_rows, rest = np.divmod(keys, max(len(genes), 1) * max(len(classes), 1))
+        link_genes, link_classes = np.divmod(rest, max(len(classes), 1))
+        link_indptr = np.zeros(n_isolates + 1, dtype=np.int64)
+        np.cumsum(np.bincount(link_rows, minlength=n_isolates), out=link_indptr[1:])
+
+        return cls(
+            isolate_ids=np.array(isolate_ids, dtype=str),
+            genes=np.array(genes, dtype=str),
+            classes=np.array(classes, dtype=str),
+            gene_indptr=gene_matrix.indptr,
+            gene_indices=gene_matrix.indices.astype(_code_dtype(len(genes))),
+            class_indptr=class_indptr,
+            class_isolates=class_rows[order].astype(np.uint32),
+            link_indptr=link_indptr,
+            link_genes=link_genes.astype(_code_dtype(len(genes))),
+            link_classes=link_classes.astype(_code_dtype(len(classes))),
+        )
+
+    def save(self, path):
+        """Write the index as a compressed ``.npz``."""
+        np.savez_compressed(path, **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as npz:
+            return cls(**{name: npz[name] for name in cls.ARRAYS})
+
+    # --- Lookups ---
+
+    def _position(self, attr, values, name, kind):
+        cache = f'_{attr}_pos'
+        if getattr(self, cache) is None:
+            setattr(self, cache, pd.Index(values))
+        try:
+            return getattr(self, cache).get_loc(name)
+        except KeyError:
+            raise KeyError(f"{kind} '{name}' is not in the index") from None
+
+    def isolate_position(self, isolate_id):
+        return self._position('isolate', self.isolate_ids, isolate_id, 'isolate')
+
+    def class_position(self, name):
+        return self._position('class', self.classes, name, 'resistance class')
+
+    def counts(self):
+        """Number of isolates, genes, classes and gene -> class links."""
+        return {'isolates': len(self.isolate_ids), 'genes': len(self.genes), 'classes': len(self.classes),
+                'links': len(self.link_genes)}
+
+    # --- Queries ---
+
+    def isolates_resistant_to(self, name):
+        """Sorted IDs of the isolates with resistance class ``name``."""
+        c = self.class_position(name)
+        rows = self.class_isolates[self.class_indptr[c]:self.class_indptr[c + 1]]
+        return self.isolate_ids[rows].tolist()
+
+    def explaining_genes(self, isolate_id, name=None):
+        """Map each resistance class of an isolate to the sorted genes conferring it.
+
+        With ``name``, only that class (an empty list if the isolate lacks it).
+        """
+        i = self.isolate_position(isolate_id)
+        start, stop = self.link_indptr[i], self.link_indptr[i + 1]
+        genes, classes = self.link_genes[start:stop], self.link_classes[start:stop]
+        if name is not None:
+            return self.genes[np.sort(genes[classes == self.class_position(name)])].tolist()
+        explained = {}
+        for c in np.unique(classes):
+            explained[str(self.classes[c])] = self.genes[np.sort(genes[classes == c])].tolist()
+        return explained
+
+    def class_drivers(self, name):
+        """Genes conferring class ``name`` across the collection, with how many isolates
+        each explains, most frequent first (ties by gene name)."""
+        c = self.class_position(name)
+        # Links are unique per isolate, so counting links counts isolates
+        per_gene = np.bincount(self.link_genes[self.link_classes == c], minlength=len(self.genes))
+        found = np.flatnonzero(per_gene)
+        order = np.lexsort((found, -per_gene[found]))
+        return [(str(self.genes[g]), int(per_gene[g])) for g in found[order]]
+
+    def class_prevalence(self, metadata, by, names=None, id_column='Isolate_ID'):
+        """Per-group prevalence of each resistance class.
+
+        ``metadata`` has one row per isolate with ``id_column`` and the ``by``
+        columns (e.g. country and collection_year from the master dataset); it
+        is joined to the index by normalized accession, and isolates without a
+        metadata row are left out. Returns one row per group and class with
+        the isolate count, resistant count and prevalence in percent.
+        """
+        from .metadata_join import index_source, normalize_accessions
+
+        by = list(by)
+        source = index_source(metadata, id_column, by, 'metadata')
+        positions = source.block.index.get_indexer(normalize_accessions(pd.Series(self.isolate_ids, dtype=object)))
+        matched = positions >= 0
+        groups = source.block[by].iloc[positions[matched]].reset_index(drop=True)
+        grouped = groups.groupby(by, dropna=False, sort=True, observed=True)
+        isolate_group = np.full(len(self.isolate_ids), -1, dtype=np.int64)
+        isolate_group[matched] = grouped.ngroup().to_numpy()
+        totals = grouped.size()
+        n_groups = len(totals)
+
+        # Resistant isolates per (class, group) in one bincount over the inverted lists
+        pair_class = np.repeat(np.arange(len(self.classes)), np.diff(self.class_indptr))
+        pair_group = isolate_group[self.class_isolates]
+        keep = pair_group >= 0
+        resistant = np.bincount(pair_class[keep] * n_groups + pair_group[keep],
+                                minlength=len(self.classes) * n_groups).reshape(len(self.classes), n_groups)
+
+        class_codes = np.arange(len(self.classes)) if names is None else np.sort([self.class_position(n) for n in names])
+        # Group-major rows (groups come sorted from groupby), classes sorted within each group
+        group_rows = np.repeat(np.arange(n_groups), len(class_codes))
+        class_rows = np.tile(class_codes, n_groups).astype(np.int64)
+        table = totals.index.to_frame(index=False).iloc[group_rows].reset_index(drop=True)
+        table['resistance_class'] = self.classes[class_rows]
+        table['isolates'] = totals.to_numpy()[group_rows]
+        table['resistant'] = resistant[class_rows, group_rows]
+        table['prevalence_percent'] = (table['resistant'] / table['isolates'] * 100).round(2)
+        return table
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Query the gene <-> resistance class <-> isolate index.")
+    parser.add_argument('--index', default='amr_resistance_index.npz', help="Index written by process_amr_data.py --resistance-index")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    isolates_cmd = commands.add_parser('isolates', help="List isolates resistant to a class")
+    isolates_cmd.add_argument('resistance_class')
+
+    genes_cmd = commands.add_parser('genes', help="List the genes conferring each class of an isolate")
+    genes_cmd.add_argument('isolate')
+    genes_cmd.add_argument('--class', dest='resistance_class', help="Only this resistance class")
+
+    drivers_cmd = commands.add_parser('drivers', help="Genes conferring a class across the collection")
+    drivers_cmd.add_argument('resistance_class')
+    drivers_cmd.add_argument('--top', type=int, help="Only the most frequent genes")
+
+    prevalence_cmd = commands.add_parser('prevalence', help="Class prevalence per metadata group")
+    prevalence_cmd.add_argument('--metadata', required=True, help="Table with Isolate_ID and the --by columns (e.g. the master dataset)")
+    prevalence_cmd.add_argument('--by', nargs='+', default=['country', 'collection_year'], help="Metadata columns to group by")
+    prevalence_cmd.add_argument('--class', dest='resistance_classes', nargs='+', help="Only these classes")
+    prevalence_cmd.add_argument('--output', help="Write the table here instead of printing it")
+
+    commands.add_parser('summary', help="Count isolates, genes, classes and links")
+    args = parser.parse_args(argv)
+
+    try:
+        index = ResistanceIndex.load(args.index)
+    except FileNotFoundError:
+        print(f"Error: index '{args.index}' not found. Build it with: amr-dataset ingest --resistance-index {args.index}")
+        return 1
+
+    try:
+        if args.command == 'isolates':
+            for isolate_id in index.isolates_resistant_to(args.resistance_class):
+                print(isolate_id)
+        elif args.command == 'genes':
+            if args.resistance_class:
+                explained = {args.resistance_class: index.explaining_genes(args.isolate, args.resistance_class)}
+            else:
+                explained = index.explaining_genes(args.isolate)
+            for name, genes in explained.items():
+                print(f"{name}: {';'.join(genes)}")
+        elif args.command == 'drivers':
+            for gene, n_isolates in index.class_drivers(args.resistance_class)[:args.top]:
+                print(f"{gene:<30} {n_isolates}")
+        elif args.command == 'prevalence':
+            from .amr_io import read_table, write_table
+            metadata = read_table(args.metadata, columns=['Isolate_ID'] + args.by, required=['Isolate_ID'] + args.by)
+            table = index.class_prevalence(metadata, args.by, args.resistance_classes)
+            if args.output:
+                write_table(table, args.output)
+                print(f"Saved {len(table)} rows to {args.output}")
+            else:
+                print(table.to_string(index=False))
+        else:
+            for key, value in index.counts().items():
+                print(f"{key}: {value}")
+    except KeyError as e:
+        print(f"Error: {e.args[0]}")
+        return 1
+    return 0
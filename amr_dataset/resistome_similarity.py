@@ -0,0 +1,202 @@
+"""Bit-packed resistome similarity and nearest-isolate search.
+
+Each isolate's gene/class presence vector is packed into 64-bit words (one
+bit per feature), so 5,000 features take 80 words (640 bytes) per isolate
+and 100k isolates fit in ~64 MB. Distances use popcounts of the ANDed words:
+with ``a``/``b`` the feature counts of two isolates and ``i`` their shared
+count, Jaccard distance is ``1 - i / (a + b - i)`` and Hamming distance is
+``a + b - 2i``. Queries are processed in batches against all isolates at once.
+
+Input is the encoder output: a sparse ``.npz`` written with
+``--sparse-output`` by clean_amr_data.py / build_master_dataset.py, or any
+encoded table (.csv/.parquet/.feather) with an Isolate_ID column.
+
+Examples:
+    amr-dataset similarity --input features.npz --query AP039418.1 -k 10
+    amr-dataset similarity --input Kaggle_AMR_Dataset_v1.0_final.csv --features gene --query AP039418.1
+    amr-dataset similarity --input features.npz --pairwise distances.npy
+"""
+import argparse
+import os
+
+import numpy as np
+
+# Bytes of temporary AND results allowed per batch
+BATCH_BYTES = 64 << 20
+
+# Popcount of every byte value, for numpy versions without np.bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """Number of set bits along the last axis of a uint64 array."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    as_bytes = words.view(np.uint8)
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def _n_words(n_features):
+    return max((n_features + 63) // 64, 1)
+
+
+def pack_csr(matrix, keep_columns=None):
+    """Pack a CsrMatrix (see amr_encoding) into ``(n_rows, n_words)`` uint64 words.
+
+    ``keep_columns`` optionally restricts packing to a subset of column
+    positions; the returned list names the packed features in order.
+    """
+    n_rows = len(matrix.indptr) - 1
+    rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(matrix.indptr))
+    cols = matrix.indices.astype(np.int64)
+    names = list(matrix.columns)
+    if keep_columns is not None:
+        remap = np.full(len(names), -1, dtype=np.int64)
+        remap[keep_columns] = np.arange(len(keep_columns))
+        cols = remap[cols]
+        rows, cols = rows[cols >= 0], cols[cols >= 0]
+        names = [names[i] for i in keep_columns]
+    packed = np.zeros((n_rows, _n_words(len(names)) * 8), dtype=np.uint8)
+    # Same bit order as np.packbits: feature 0 is the high bit of byte 0
+    np.bitwise_or.at(packed, (rows, cols >> 3), (1 << (7 - (cols & 7))).astype(np.uint8))
+    return packed.view(np.uint64), names
+
+
+def pack_dense(values):
+    """Pack a dense ``(n_rows, n_features)`` 0/1 array into uint64 words."""
+    n_rows, n_features = values.shape
+    packed = np.zeros((n_rows, _n_words(n_features) * 8), dtype=np.uint8)
+    bits = np.packbits(np.asarray(values, dtype=bool), axis=1)
+    packed[:, :bits.shape[1]] = bits
+    return packed.view(np.uint64)
+
+
+def load_packed(path, features='all', chunksize=100_000):
+    """Load encoder output as ``(isolate_ids, packed_words, feature_names)``.
+
+    ``features`` is 'gene', 'class' or 'all'; gene/class selection relies on
+    the ``gene_``/``class_`` column prefixes (ValueError if there are none).
+    """
+    prefix = {'gene': 'gene_', 'class': 'class_'}.get(features)
+    if path.endswith('.npz'):
+        from .amr_encoding import load_csr
+        matrix, isolate_ids = load_csr(path)
+        keep = None
+        if prefix is not None:
+            keep = np.array([i for i, c in enumerate(matrix.columns) if c.startswith(prefix)], dtype=np.int64)
+            if not len(keep):
+                # e.g. the unprefixed matrix of amr-dataset encode --sparse-output
+                raise ValueError(f"{path} has no {prefix} columns; use --features all")
+        words, names = pack_csr(matrix, keep)
+        return isolate_ids, words, names
+
+    from .amr_io import NON_FEATURE_COLUMNS, iter_table, read_columns
+    columns = read_columns(path)
+    if prefix is not None:
+        names = [c for c in columns if c.startswith(prefix)]
+    else:
+        names = [c for c in columns if c.startswith(('gene_', 'class_'))]
+        if not names:
+            # Unprefixed encoded table (amr_summary_cleaned.csv)
+            names = [c for c in columns if c not in NON_FEATURE_COLUMNS]
+    isolate_ids = []
+    blocks = []
+    for chunk in iter_table(path, columns=['Isolate_ID'] + names, chunksize=chunksize):
+        isolate_ids.extend(chunk['Isolate_ID'].astype(str))
+        blocks.append(pack_dense(chunk[names].to_numpy(dtype=np.uint8)))
+    words = np.concatenate(blocks) if blocks else np.zeros((0, _n_words(len(names))), dtype=np.uint64)
+    return isolate_ids, words, names
+
+
+def distances(query_words, words, counts=None, metric='jaccard'):
+    """Distances from each query row to every row of ``words``.
+
+    Returns a ``(n_queries, n_rows)`` float32 array. Works through the
+    queries in batches so the temporary AND results stay under BATCH_BYTES.
+    """
+    if counts is None:
+        counts = popcount(words)
+    query_counts = popcount(query_words)
+    out = np.empty((len(query_words), len(words)), dtype=np.float32)
+    batch = max(1, BATCH_BYTES // max(words.nbytes, 1))
+    for start in range(0, len(query_words), batch):
+        q = query_words[start:start + batch]
+        shared = popcount(q[:, None, :] & words[None, :, :])
+        total = query_counts[start:start + batch, None] + counts[None, :]
+        if metric == 'hamming':
+            out[start:start + batch] = total - 2 * shared
+        else:
+            union = total - shared
+            with np.errstate(invalid='ignore', divide='ignore'):
+                # Two empty resistomes are identical (distance 0)
+                out[start:start + batch] = np.where(union > 0, 1 - shared / union, 0.0)
+    return out
+
+
+def nearest(query_index, words, k=10, metric='jaccard', counts=None):
+    """Indices and distances of the ``k`` isolates closest to row ``query_index``."""
+    dist = distances(words[query_index:query_index + 1], words, counts, metric)[0]
+    dist[query_index] = np.inf
+    k = min(k, len(dist) - 1)
+    if k <= 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+    top = np.argpartition(dist, k - 1)[:k]
+    top = top[np.lexsort((top, dist[top]))]
+    return top, dist[top]
+
+
+def pairwise(words, path=None, metric='jaccard', block=1024):
+    """Full pairwise distance matrix, optionally written to a ``.npy`` memmap.
+
+    Rows are computed ``block`` isolates at a time, so with ``path`` the
+    matrix can be larger than memory.
+    """
+    n = len(words)
+    if path is None:
+        out = np.empty((n, n), dtype=np.float32)
+    else:
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(n, n))
+    counts = popcount(words)
+    for start in range(0, n, block):
+        out[start:start + block] = distances(words[start:start + block], words, counts, metric)
+    if path is not None:
+        out.flush()
+    return out
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Find isolates with the most similar resistome using bit-packed gene/class vectors.")
+    parser.add_argument('--input', required=True, help="Sparse .npz from --sparse-output, or an encoded table")
+    parser.add_argument('--features', choices=['gene', 'class', 'all'], default='all', help="Which presence columns to compare")
+    parser.add_argument('--metric', choices=['jaccard', 'hamming'], default='jaccard')
+    parser.add_argument('--query', action='append', default=[], help="Isolate_ID to find neighbours for (repeatable)")
+    parser.add_argument('-k', type=int, default=10, help="Number of neighbours per query")
+    parser.add_argument('--pairwise', help="Write the full pairwise distance matrix to this .npy file")
+    args = parser.parse_args(argv)
+
+    try:
+        isolate_ids, words, names = load_packed(args.input, args.features)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Loaded {len(isolate_ids)} isolates x {len(names)} features ({words.nbytes / 1e6:.1f} MB packed)")
+
+    positions = {isolate_id: i for i, isolate_id in enumerate(isolate_ids)}
+    counts = popcount(words)
+    missing = False
+    for query in args.query:
+        if query not in positions:
+            print(f"Error: '{query}' is not in {args.input}")
+            missing = True
+            continue
+        top, dist = nearest(positions[query], words, args.k, args.metric, counts)
+        print(f"\n--- {len(top)} nearest isolates to {query} ({args.metric}) ---")
+        for i, d in zip(top, dist):
+            print(f"{isolate_ids[i]:<20} {d:.4f}")
+
+    if args.pairwise:
+        pairwise(words, args.pairwise, args.metric)
+        with open(os.path.splitext(args.pairwise)[0] + '.ids.txt', 'w') as handle:
+            handle.write('\n'.join(isolate_ids) + '\n')
+        print(f"\nSaved {len(isolate_ids)}x{len(isolate_ids)} distance matrix to {args.pairwise}")
+    return 1 if missing else 0
@@ -0,0 +1,299 @@
+"""Run the AMR dataset pipeline as a dependency graph of cached stages.
+
+Each stage is one ``amr-dataset`` command with declared input and output
+files, run in its own interpreter. Stage order comes from matching outputs
+to inputs. A stage is skipped when its outputs exist and the content hashes
+of its inputs, its code (the command's module plus the package modules it
+imports) and its arguments match the last successful run. Independent
+stages run concurrently.
+
+Usage (from anywhere):
+    amr-dataset pipeline                 # build everything that is stale
+    amr-dataset pipeline build --jobs 4  # one target plus its upstream stages
+    amr-dataset pipeline --dry-run       # show what would run
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .cli import COMMANDS
+from .ingest_manifest import file_hash
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# The checkout containing the package; stage paths are relative to it by default
+REPO_ROOT = os.path.dirname(PACKAGE_DIR)
+
+RAW = 'data/raw'
+PROCESSED = 'data/processed'
+ABRICATE_DIR = f'{RAW}/ABRicate Run'
+GENOMES_DIR = f'{RAW}/Genome Extractor Run'
+PUB_METADATA = f'{RAW}/NCBI Metadata Run/metadata_3ebce10c-02d3-448b-a224-4290ec9583cd.csv'
+HARMONIZED_METADATA = f'{RAW}/NCBI Metadata Run/all_filtered_harmonized_metadata.csv'
+SUMMARY = f'{PROCESSED}/amr_summary_dataset.csv'
+CLEANED = f'{PROCESSED}/amr_summary_cleaned.csv'
+
+STATE_FILE = f'{PROCESSED}/.pipeline_state.json'
+
+# command is an amr-dataset subcommand; inputs/outputs are files or directories
+Stage = namedtuple('Stage', ['name', 'command', 'inputs', 'outputs', 'args'])
+
+STAGES = [
+    Stage('ingest', 'ingest',
+          [ABRICATE_DIR, GENOMES_DIR], [SUMMARY, f'{PROCESSED}/amr_resistance_index.npz'],
+          ['--results-dir', ABRICATE_DIR, '--genomes-dir', GENOMES_DIR, '--output', SUMMARY,
+           '--manifest', f'{PROCESSED}/amr_ingest_manifest.json',
+           '--resistance-index', f'{PROCESSED}/amr_resistance_index.npz']),
+    Stage('encode', 'encode',
+          [SUMMARY], [CLEANED],
+          ['--input', SUMMARY, '--output', CLEANED]),
+    Stage('index', 'index',
+          [SUMMARY], [f'{PROCESSED}/amr_index.sqlite'],
+          ['--input', SUMMARY, '--output', f'{PROCESSED}/amr_index.sqlite']),
+    Stage('select', 'select',
+          [CLEANED], [f'{PROCESSED}/amr_dataset_variable_features.csv'],
+          ['--input', CLEANED, '--output', f'{PROCESSED}/amr_dataset_variable_features.csv']),
+    Stage('merge', 'merge',
+          [CLEANED, HARMONIZED_METADATA], [f'{PROCESSED}/amr_dataset_final_enriched.csv'],
+          ['--input', CLEANED, '--metadata', HARMONIZED_METADATA,
+           '--output', f'{PROCESSED}/amr_dataset_final_enriched.csv']),
+    Stage('prefixed', 'prefixed',
+          [SUMMARY], [f'{PROCESSED}/amr_dataset_final_prefixed.csv'],
+          ['--input', SUMMARY, '--output', f'{PROCESSED}/amr_dataset_final_prefixed.csv']),
+    Stage('build', 'build',
+          [SUMMARY, PUB_METADATA], [f'{PROCESSED}/Kaggle_AMR_Dataset_v1.0_final.csv'],
+          ['--input', SUMMARY, '--pub-metadata', PUB_METADATA,
+           '--output', f'{PROCESSED}/Kaggle_AMR_Dataset_v1.0_final.csv']),
+]
+
+
+def dependencies(stages):
+    """Map each stage name to the names of the stages producing its inputs."""
+    producers = {out: stage.name for stage in stages for out in stage.outputs}
+    return {stage.name: {producers[i] for i in stage.inputs if i in producers} for stage in stages}
+
+
+def select_stages(stages, targets):
+    """Return the stages needed for ``targets`` (all if empty), in declared order."""
+    if not targets:
+        return list(stages)
+    deps = dependencies(stages)
+    unknown = set(targets) - set(deps)
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(deps)}")
+    needed = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(deps[name])
+    return [stage for stage in stages if stage.name in needed]
+
+
+def command_module(command):
+    """Path of the module implementing an amr-dataset command."""
+    return os.path.join(PACKAGE_DIR, COMMANDS[command][0] + '.py')
+
+
+def local_imports(module_path, seen=None):
+    """The module plus every package module it imports (relatively), recursively."""
+    seen = set() if seen is None else seen
+    if module_path in seen:
+        return seen
+    seen.add(module_path)
+    with open(module_path) as handle:
+        tree = ast.parse(handle.read(), module_path)
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ImportFrom) or node.level != 1:
+            continue
+        # "from .amr_io import x" names the module; "from . import amr_index" the imported names
+        names = [node.module] if node.module else [alias.name for alias in node.names]
+        for name in names:
+            path = os.path.join(PACKAGE_DIR, name.split('.')[0] + '.py')
+            if os.path.exists(path):
+                local_imports(path, seen)
+    return seen
+
+
+class FileHasher:
+    """Content hashes of files and directories, reusing hashes of unchanged files.
+
+    Relative paths are resolved against ``root`` but cached under their
+    relative names, so the state stays valid if the tree is moved.
+    """
+
+    def __init__(self, cache, root='.'):
+        # path -> {'size', 'mtime_ns', 'sha256'}
+        self.cache = cache
+        self.root = root
+
+    def file(self, path):
+        full_path = os.path.join(self.root, path)
+        st = os.stat(full_path)
+        cached = self.cache.get(path)
+        if cached and cached['size'] == st.st_size and cached['mtime_ns'] == st.st_mtime_ns:
+            return cached['sha256']
+        digest = file_hash(full_path)
+        self.cache[path] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def path(self, path):
+        """Hash a file, or a directory as the names, sizes and mtimes of its files."""
+        full_path = os.path.join(self.root, path)
+        if not os.path.isdir(full_path):
+            return self.file(path)
+        # Directories (raw genome/report folders) are fingerprinted by stat only;
+        # the ingest stage does its own per-file content checks.
+        digest = hashlib.sha256()
+        for dirpath, _, filenames in sorted(os.walk(full_path)):
+            for filename in sorted(filenames):
+                st = os.stat(os.path.join(dirpath, filename))
+                rel = os.path.relpath(os.path.join(dirpath, filename), full_path)
+                digest.update(f'{rel}\0{st.st_size}\0{st.st_mtime_ns}\n'.encode())
+        return digest.hexdigest()
+
+
+def stage_signature(stage, hasher):
+    """Hash of a stage's code, arguments and inputs."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(stage.args).encode())
+    for code_path in sorted(local_imports(command_module(stage.command))):
+        digest.update(os.path.basename(code_path).encode() + hasher.file(code_path).encode())
+    for path in stage.inputs:
+        digest.update(path.encode() + hasher.path(path).encode())
+    return digest.hexdigest()
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return {'stages': {}, 'files': {}}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_state(path, state):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as handle:
+        json.dump(state, handle, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def stage_command(stage):
+    """``(argv, env)`` running a stage's command in a fresh interpreter.
+
+    The directory containing the package goes on PYTHONPATH, so stages also
+    run from a checkout where the package is not installed.
+    """
+    python_path = os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')]))
+    return ([sys.executable, '-m', __package__, stage.command] + stage.args,
+            dict(os.environ, PYTHONPATH=python_path))
+
+
+def run_stage(stage, root=REPO_ROOT):
+    """Run one stage's command from ``root``; return (returncode, seconds, output)."""
+    start = time.time()
+    argv, env = stage_command(stage)
+    proc = subprocess.run(argv, cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return proc.returncode, time.time() - start, proc.stdout
+
+
+def run_pipeline(stages, jobs=1, force=False, dry_run=False, state_file=STATE_FILE, root=REPO_ROOT):
+    """Run stale stages in dependency order from ``root``; return the names of failed stages.
+
+    Stage paths and a relative ``state_file`` are taken relative to ``root``.
+    """
+    state_file = os.path.join(root, state_file)
+    state = load_state(state_file)
+    hasher = FileHasher(state['files'], root)
+    deps = dependencies(stages)
+    pending = {stage.name: stage for stage in stages}
+    done = set()
+    failed = set()
+    # Stages that ran (or would run, for --dry-run) in this invocation
+    rebuilt = set()
+    running = {}
+
+    def ready(name):
+        return deps[name] <= done
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        while pending or running:
+            for name in [n for n in pending if ready(n)]:
+                stage = pending.pop(name)
+                missing = [p for p in stage.inputs if not os.path.exists(os.path.join(root, p))]
+                if missing:
+                    print(f"[{name}] skipped: missing input {', '.join(missing)}")
+                    failed.add(name)
+                    continue
+                signature = stage_signature(stage, hasher)
+                up_to_date = (state['stages'].get(name) == signature
+                              and all(os.path.exists(os.path.join(root, p)) for p in stage.outputs))
+                if dry_run and deps[name] & rebuilt:
+                    # Upstream outputs would change, so this stage would too
+                    up_to_date = False
+                if up_to_date and not force:
+                    print(f"[{name}] up to date")
+                    done.add(name)
+                elif dry_run:
+                    print(f"[{name}] would run: amr-dataset {stage.command}")
+                    rebuilt.add(name)
+                    done.add(name)
+                else:
+                    print(f"[{name}] running amr-dataset {stage.command}")
+                    running[pool.submit(run_stage, stage, root)] = (stage, signature)
+
+            # Stages blocked by a failed dependency can never run
+            for name in [n for n in pending if deps[n] & failed]:
+                print(f"[{name}] skipped: upstream stage failed")
+                pending.pop(name)
+                failed.add(name)
+
+            if not running:
+                if pending and not any(ready(n) for n in pending):
+                    break
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, signature = running.pop(future)
+                returncode, seconds, output = future.result()
+                if returncode == 0:
+                    print(f"[{stage.name}] finished in {seconds:.1f}s")
+                    state['stages'][stage.name] = signature
+                    rebuilt.add(stage.name)
+                    done.add(stage.name)
+                else:
+                    print(f"[{stage.name}] FAILED (exit {returncode}):\n{output}")
+                    state['stages'].pop(stage.name, None)
+                    failed.add(stage.name)
+            if not dry_run:
+                save_state(state_file, state)
+
+    if not dry_run:
+        save_state(state_file, state)
+    return failed
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Run the AMR dataset pipeline, skipping stages whose inputs and code are unchanged.")
+    parser.add_argument('targets', nargs='*', help=f"Stages to build with their upstream stages (default: all of {', '.join(s.name for s in STAGES)})")
+    parser.add_argument('--jobs', '-j', type=int, default=1, help="Number of stages to run concurrently")
+    parser.add_argument('--force', action='store_true', help="Re-run selected stages even if up to date")
+    parser.add_argument('--dry-run', action='store_true', help="Only report which stages would run")
+    parser.add_argument('--root', default=REPO_ROOT, help="Directory holding data/raw and data/processed (default: this checkout)")
+    args = parser.parse_args(argv)
+
+    failed = run_pipeline(select_stages(STAGES, args.targets), jobs=args.jobs, force=args.force, dry_run=args.dry_run,
+                          root=args.root)
+    if failed:
+        print(f"Pipeline incomplete; failed or skipped: {', '.join(sorted(failed))}")
+        return 1
+    print("Pipeline complete.")
+    return 0
@@ -0,0 +1,205 @@
+"""Time and memory-profile each pipeline stage on a synthetic workspace.
+
+Generates (or reuses) a synthetic workspace with synthetic_data.py, then runs
+the pipeline stages from run_pipeline.py one at a time in their own
+processes, recording wall time, user/system CPU time and peak RSS of each
+(via ``os.wait4``). Results are saved as JSON tagged with the git commit, so
+runs can be compared across commits with ``--compare``. Nothing is
+downloaded.
+
+Scales:
+    small   1,000 isolates,   500 genes
+    medium  100,000 isolates, 2,000 genes
+    large   1,000,000 isolates, 5,000 genes
+
+Usage:
+    python benchmarks/run_benchmarks.py --scale small
+    python benchmarks/run_benchmarks.py --isolates 20000 --genes 1000 --workdir /tmp/amr-bench
+    python benchmarks/run_benchmarks.py --scale small --stages encode build --compare benchmarks/results/old.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from amr_dataset.run_pipeline import STAGES, select_stages, stage_command
+from synthetic_data import generate, load_params, workspace_params
+
+SCALES = {
+    'small': {'isolates': 1_000, 'genes': 500, 'genome_length': 5000},
+    'medium': {'isolates': 100_000, 'genes': 2_000, 'genome_length': 2000},
+    'large': {'isolates': 1_000_000, 'genes': 5_000, 'genome_length': 1000},
+}
+
+
+def git_revision():
+    """``(commit, dirty)`` of the repository, or ``(None, None)`` outside git."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def measure(command, cwd, log_path, env=None):
+    """Run a command; return its exit code, wall time, CPU times and peak RSS."""
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        proc = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        else:
+            proc.wait()
+            usage = None
+    result = {'returncode': proc.returncode, 'wall_seconds': round(time.perf_counter() - start, 3)}
+    if usage is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        rss_bytes = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+        result.update({'user_seconds': round(usage.ru_utime, 3), 'system_seconds': round(usage.ru_stime, 3),
+                       'peak_rss_mb': round(rss_bytes / 2**20, 1)})
+    return result
+
+
+def output_size(workdir, paths):
+    """Total bytes of a stage's outputs."""
+    total = 0
+    for path in paths:
+        full = os.path.join(workdir, path)
+        if os.path.exists(full):
+            total += os.path.getsize(full)
+    return total
+
+
+def run_benchmarks(workdir, stages, repeat=1):
+    """Run each stage ``repeat`` times in ``workdir``; keep the fastest run of each."""
+    results = {}
+    failed = set()
+    for stage in stages:
+        upstream = {s.name for s in STAGES if set(s.outputs) & set(stage.inputs)}
+        if upstream & failed:
+            print(f"[{stage.name}] skipped: upstream stage failed")
+            failed.add(stage.name)
+            continue
+        command, env = stage_command(stage)
+        if stage.name == 'ingest':
+            # Time a cold ingest, not the manifest cache
+            command.append('--no-cache')
+        best = None
+        for _ in range(repeat):
+            run = measure(command, workdir, os.path.join(workdir, f"{stage.name}.log"), env)
+            if run['returncode'] != 0:
+                best = run
+                break
+            if best is None or run['wall_seconds'] < best['wall_seconds']:
+                best = run
+        best['output_bytes'] = output_size(workdir, stage.outputs)
+        results[stage.name] = best
+        if best['returncode'] != 0:
+            print(f"[{stage.name}] FAILED (exit {best['returncode']}); see {stage.name}.log in {workdir}")
+            failed.add(stage.name)
+        else:
+            print(f"[{stage.name}] {best['wall_seconds']:.2f}s wall, {best.get('peak_rss_mb', float('nan')):.0f} MB peak RSS")
+    return results
+
+
+def compare(current, baseline_path):
+    """Print per-stage time and memory ratios against an earlier results file."""
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    print(f"\n--- Compared with {baseline_path} (commit {str(baseline.get('commit'))[:10]}) ---")
+    if baseline.get('params') != current['params']:
+        print("Warning: the two runs used different synthetic parameters.")
+    print(f"{'stage':<10} {'wall (s)':>18} {'ratio':>7} {'peak RSS (MB)':>22} {'ratio':>7}")
+    for name, now in current['stages'].items():
+        then = baseline['stages'].get(name)
+        if then is None or now['returncode'] != 0 or then['returncode'] != 0:
+            continue
+        wall = f"{then['wall_seconds']:.2f} -> {now['wall_seconds']:.2f}"
+        rss_then, rss_now = then.get('peak_rss_mb'), now.get('peak_rss_mb')
+        rss = f"{rss_then} -> {rss_now}" if rss_then and rss_now else 'n/a'
+        rss_ratio = f"{rss_now / rss_then:.2f}x" if rss_then and rss_now else ''
+        print(f"{name:<10} {wall:>18} {now['wall_seconds'] / max(then['wall_seconds'], 1e-9):>6.2f}x {rss:>22} {rss_ratio:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each AMR pipeline stage on synthetic data.")
+    parser.add_argument('--scale', choices=SCALES, default='small', help="Preset workspace size")
+    parser.add_argument('--isolates', type=int, help="Override the preset number of isolates")
+    parser.add_argument('--genes', type=int, help="Override the preset gene catalogue size")
+    parser.add_argument('--genome-length', type=int, help="Override the preset bases per genome")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="Workspace directory; reused if it holds data with the same parameters (default: a temporary directory)")
+    parser.add_argument('--stages', nargs='+', help=f"Stages to run with their upstream stages (default: all of {', '.join(s.name for s in STAGES)})")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per stage; the fastest is kept")
+    parser.add_argument('--output', help="Results JSON (default: benchmarks/results/<commit>-<scale>.json)")
+    parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    params = dict(SCALES[args.scale])
+    for key in ('isolates', 'genes', 'genome_length'):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='amr-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    expected = workspace_params(params['isolates'], params['genes'], genome_length=params['genome_length'], seed=args.seed)
+    generate_seconds = None
+    if load_params(workdir) == expected:
+        print(f"Reusing synthetic workspace in {workdir}")
+    else:
+        print(f"Generating {params['isolates']} synthetic isolates in {workdir}...")
+        start = time.perf_counter()
+        generate(workdir, params['isolates'], params['genes'], genome_length=params['genome_length'], seed=args.seed)
+        generate_seconds = round(time.perf_counter() - start, 3)
+    os.makedirs(os.path.join(workdir, 'data', 'processed'), exist_ok=True)
+
+    stages = select_stages(STAGES, args.stages or [])
+    try:
+        stage_results = run_benchmarks(workdir, stages, args.repeat)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    commit, dirty = git_revision()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': expected,
+        'generate_seconds': generate_seconds,
+        'stages': stage_results,
+    }
+    output = args.output
+    if output is None:
+        label = args.scale if not (args.isolates or args.genes or args.genome_length) else f"{params['isolates']}x{params['genes']}"
+        output = os.path.join(BENCH_DIR, 'results', f"{(commit or 'nogit')[:10]}-{label}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(results, handle, indent=2)
+    print(f"\nSaved benchmark results to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    if any(r['returncode'] != 0 for r in stage_results.values()) or len(stage_results) < len(stages):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
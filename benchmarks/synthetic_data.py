@@ -0,0 +1,237 @@
+"""Generate a synthetic AMR workspace for benchmarking the pipeline offline.
+
+Writes the raw inputs in the repository layout (paths from run_pipeline.py)
+under a workspace directory:
+
+- ``data/raw/ABRicate Run/<id>.tsv``: ABRicate reports with per-hit
+  coverage/identity/database values
+- ``data/raw/Genome Extractor Run/<id>.fasta``: 1-5 contig genomes with
+  isolate-specific GC content and a sprinkling of N bases
+- the harmonized and publication NCBI metadata CSVs, with messy dates,
+  hosts and isolation sources, missing and duplicated accessions
+
+Gene prevalence follows a Zipf-like curve scaled to ``mean_genes`` per
+isolate, so a few genes are near-universal and most are rare, as in the
+real data. Output is deterministic for a given seed.
+
+Usage:
+    python benchmarks/synthetic_data.py --workdir /tmp/amr-bench --isolates 100000 --genes 1000
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amr_dataset.run_pipeline import ABRICATE_DIR, GENOMES_DIR, HARMONIZED_METADATA, PUB_METADATA
+
+# Generation parameters are recorded here so a workspace can be reused
+PARAMS_FILE = 'synthetic.json'
+
+# Isolates generated per batch; bounds the size of the presence matrix in memory
+BATCH_SIZE = 2000
+
+ABRICATE_HEADER = '#FILE\tSEQUENCE\tSTART\tEND\tSTRAND\tGENE\tCOVERAGE\tCOVERAGE_MAP\tGAPS\t%COVERAGE\t%IDENTITY\tDATABASE\tACCESSION\tPRODUCT\tRESISTANCE\n'
+DATABASES = ['card', 'resfinder', 'ncbi', 'argannot', 'megares']
+GENE_PREFIXES = ['bla', 'aac', 'aph', 'ant', 'tet', 'sul', 'dfr', 'erm', 'mcr', 'qnr', 'mdt', 'acr', 'gad', 'cat', 'fos', 'van']
+RESISTANCE_CLASSES = [
+    'aminocoumarin', 'aminoglycoside', 'beta-lactam', 'carbapenem', 'cephalosporin', 'colistin',
+    'diaminopyrimidine', 'elfamycin', 'fluoroquinolone', 'fosfomycin', 'fusidic acid', 'glycopeptide',
+    'lincosamide', 'macrolide', 'monobactam', 'mupirocin', 'nitroimidazole', 'nucleoside',
+    'oxazolidinone', 'penam', 'penem', 'peptide', 'phenicol', 'pleuromutilin', 'rifamycin',
+    'streptogramin', 'sulfonamide', 'tetracycline', 'triclosan', 'trimethoprim',
+]
+
+# Messy values as they appear in NCBI exports ('' becomes an empty cell)
+DATE_STYLES = ['%Y-%m-%d', '%Y/%m/%d', '%m/%d/%Y', '%Y', '%Y-%m']
+MISSING_VALUES = ['', 'missing', 'not collected', 'Unknown', 'N/A']
+HOSTS = ['Homo sapiens', 'human', 'Human', 'patient', 'Gallus gallus', 'chicken', 'Chicken', 'broiler',
+         'Bos taurus', 'cattle', 'cow', 'Sus scrofa', 'pig', 'swine', 'dog', 'Canis lupus familiaris',
+         'Ovis aries', 'turkey', 'environment', 'soil']
+SOURCES = ['blood', 'Blood culture', 'urine', 'Urine', 'feces', 'stool', 'Fecal sample', 'rectal swab',
+           'wound', 'sputum', 'wastewater', 'river water', 'soil', 'retail chicken meat', 'ground beef',
+           'pork', 'milk', 'food', 'hospital sink', 'clinical isolate']
+COUNTRIES = ['USA', 'United Kingdom', 'China', 'India', 'Brazil', 'Germany', 'Japan', 'Nigeria', 'Australia', 'Spain']
+ORGANISMS = ['Escherichia coli', 'Klebsiella pneumoniae', 'Salmonella enterica', 'Acinetobacter baumannii']
+ASSEMBLY_LEVELS = ['Complete Genome', 'Chromosome', 'Scaffold', 'Contig']
+
+
+def isolate_ids(n_isolates):
+    """Synthetic accession.version IDs, e.g. 'SYN00000001.1'."""
+    return [f"SYN{i:08d}.1" for i in range(n_isolates)]
+
+
+def gene_catalogue(n_genes, n_classes, rng):
+    """Gene names and the semicolon-separated resistance classes of each gene."""
+    classes = RESISTANCE_CLASSES[:max(1, min(n_classes, len(RESISTANCE_CLASSES)))]
+    names = [f"{GENE_PREFIXES[j % len(GENE_PREFIXES)]}{chr(65 + (j // len(GENE_PREFIXES)) % 26)}-{j}"
+             for j in range(n_genes)]
+    resistances = []
+    for _ in range(n_genes):
+        picked = rng.choice(len(classes), size=rng.integers(1, min(3, len(classes)) + 1), replace=False)
+        resistances.append(';'.join(classes[k] for k in sorted(picked)))
+    return names, resistances
+
+
+def gene_prevalence(n_genes, mean_genes, exponent=0.9, max_prevalence=0.97):
+    """Per-gene presence probabilities on a Zipf-like curve summing to ~``mean_genes``."""
+    ranks = np.arange(1, n_genes + 1, dtype=np.float64) ** -exponent
+    lo, hi = 0.0, float(n_genes)
+    for _ in range(60):
+        scale = (lo + hi) / 2
+        if np.minimum(ranks * scale, max_prevalence).sum() < mean_genes:
+            lo = scale
+        else:
+            hi = scale
+    return np.minimum(ranks * lo, max_prevalence)
+
+
+def write_report(path, isolate_id, genes, names, resistances, rng):
+    """One ABRicate report with a hit line per present gene."""
+    coverage = np.round(rng.uniform(60, 100, len(genes)), 2)
+    identity = np.round(rng.uniform(80, 100, len(genes)), 2)
+    databases = rng.integers(0, len(DATABASES), len(genes))
+    lines = [ABRICATE_HEADER]
+    for k, j in enumerate(genes):
+        start = 1000 * k + 1
+        lines.append(f"{isolate_id}.fasta\tcontig1\t{start}\t{start + 899}\t+\t{names[j]}\t1-900/900\t"
+                     f"===============\t0/0\t{coverage[k]:.2f}\t{identity[k]:.2f}\t{DATABASES[databases[k]]}\t"
+                     f"ACC{j:06d}\t{names[j]} product\t{resistances[j]}\n")
+    with open(path, 'w') as handle:
+        handle.writelines(lines)
+
+
+def write_fasta(path, genome_length, rng, line_width=80):
+    """A 1-5 contig genome with an isolate-specific GC content."""
+    gc = rng.uniform(0.38, 0.58)
+    draws = rng.random(genome_length)
+    bases = np.full(genome_length, ord('A'), dtype=np.uint8)
+    bases[draws < gc / 2] = ord('G')
+    bases[(draws >= gc / 2) & (draws < gc)] = ord('C')
+    bases[(draws >= gc) & (draws < gc + (1 - gc) / 2)] = ord('T')
+    bases[rng.random(genome_length) < 0.001] = ord('N')
+    cuts = np.sort(rng.choice(np.arange(1, genome_length), size=rng.integers(0, 5), replace=False))
+    sequence = bases.tobytes()
+    with open(path, 'wb') as handle:
+        for n, (start, stop) in enumerate(zip([0, *cuts], [*cuts, genome_length]), 1):
+            handle.write(f">contig{n} length={stop - start}\n".encode())
+            for pos in range(start, stop, line_width):
+                handle.write(sequence[pos:min(pos + line_width, stop)] + b'\n')
+
+
+def messy_date(rng):
+    """A collection date in one of the formats seen in NCBI exports, or a missing marker."""
+    if rng.random() < 0.1:
+        return MISSING_VALUES[rng.integers(len(MISSING_VALUES))]
+    year, month, day = rng.integers(1995, 2024), rng.integers(1, 13), rng.integers(1, 29)
+    style = DATE_STYLES[rng.integers(len(DATE_STYLES))]
+    return style.replace("%Y", str(year)).replace("%m", f"{month:02d}").replace("%d", f"{day:02d}")
+
+
+def pick(values, rng, missing=0.1):
+    """A random value, or a missing marker with probability ``missing``."""
+    if rng.random() < missing:
+        return MISSING_VALUES[rng.integers(len(MISSING_VALUES))]
+    return values[rng.integers(len(values))]
+
+
+def write_metadata(workdir, ids, rng):
+    """Harmonized and publication metadata CSVs for ~90% of the isolates (a few duplicated)."""
+    import pandas as pd
+
+    keep = [i for i in ids if rng.random() < 0.9]
+    keep += [keep[k] for k in rng.integers(0, len(keep), size=len(keep) // 100)] if keep else []
+    harmonized = pd.DataFrame({
+        'accession': keep,
+        'organism': [pick(ORGANISMS, rng, 0.0) for _ in keep],
+        'strain': [f"strain-{k}" for k in range(len(keep))],
+        'collection_date': [messy_date(rng) for _ in keep],
+        'country': [pick(COUNTRIES, rng) for _ in keep],
+        'host': [pick(HOSTS, rng) for _ in keep],
+        'isolation_source': [pick(SOURCES, rng) for _ in keep],
+        'bioproject': [f"PRJNA{rng.integers(100000, 999999)}" for _ in keep],
+        'biosample': [f"SAMN{rng.integers(10000000, 99999999)}" for _ in keep],
+    })
+    path = os.path.join(workdir, HARMONIZED_METADATA)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    harmonized.to_csv(path, index=False)
+
+    # The publication export is keyed by the accession without its version
+    bases = sorted({i.split('.')[0] for i in keep})
+    publications = pd.DataFrame({
+        'accession': bases,
+        'assembly_level': [pick(ASSEMBLY_LEVELS, rng, 0.0) for _ in bases],
+        'ref_authors': [f"Author {rng.integers(1, 500)} et al." for _ in bases],
+        'ref_title': [f"Genomic surveillance study {rng.integers(1, 2000)}" for _ in bases],
+        'ref_journal': [pick(['J Antimicrob Chemother', 'Nat Commun', 'mBio', 'Lancet Microbe'], rng, 0.2) for _ in bases],
+        'ref_pubmed': [int(rng.integers(20000000, 39999999)) for _ in bases],
+        'organism': [pick(ORGANISMS, rng, 0.0) for _ in bases],
+        'biosample': [f"SAMN{rng.integers(10000000, 99999999)}" for _ in bases],
+        'bioproject': [f"PRJNA{rng.integers(100000, 999999)}" for _ in bases],
+        'taxonomy': [562] * len(bases),
+    })
+    publications.to_csv(os.path.join(workdir, PUB_METADATA), index=False)
+
+
+def workspace_params(n_isolates, n_genes, n_classes=30, mean_genes=25.0, genome_length=5000, seed=0):
+    """The parameters recorded for a workspace, as stored in PARAMS_FILE."""
+    return {'isolates': n_isolates, 'genes': n_genes, 'classes': n_classes, 'mean_genes': float(mean_genes),
+            'genome_length': genome_length, 'seed': seed}
+
+
+def generate(workdir, n_isolates, n_genes, n_classes=30, mean_genes=25.0, genome_length=5000, seed=0):
+    """Write a synthetic workspace to ``workdir`` and return its parameters."""
+    params = workspace_params(n_isolates, n_genes, n_classes, mean_genes, genome_length, seed)
+    rng = np.random.default_rng(seed)
+    reports_dir = os.path.join(workdir, ABRICATE_DIR)
+    genomes_dir = os.path.join(workdir, GENOMES_DIR)
+    os.makedirs(reports_dir, exist_ok=True)
+    os.makedirs(genomes_dir, exist_ok=True)
+
+    names, resistances = gene_catalogue(n_genes, n_classes, rng)
+    prevalence = gene_prevalence(n_genes, mean_genes)
+    ids = isolate_ids(n_isolates)
+    for start in range(0, n_isolates, BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        presence = rng.random((len(batch), n_genes)) < prevalence
+        for isolate_id, row in zip(batch, presence):
+            write_report(os.path.join(reports_dir, isolate_id + '.tsv'), isolate_id, np.flatnonzero(row),
+                         names, resistances, rng)
+            write_fasta(os.path.join(genomes_dir, isolate_id + '.fasta'), genome_length, rng)
+        print(f"Generated {min(start + BATCH_SIZE, n_isolates)}/{n_isolates} isolates")
+
+    write_metadata(workdir, ids, rng)
+    with open(os.path.join(workdir, PARAMS_FILE), 'w') as handle:
+        json.dump(params, handle, indent=2, sort_keys=True)
+    return params
+
+
+def load_params(workdir):
+    """Parameters of an existing workspace, or None."""
+    try:
+        with open(os.path.join(workdir, PARAMS_FILE)) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic AMR workspace (reports, genomes, metadata).")
+    parser.add_argument('--workdir', required=True, help="Directory to write the workspace to")
+    parser.add_argument('--isolates', type=int, default=1000)
+    parser.add_argument('--genes', type=int, default=500, help="Size of the gene catalogue")
+    parser.add_argument('--classes', type=int, default=30, help=f"Number of resistance classes (max {len(RESISTANCE_CLASSES)})")
+    parser.add_argument('--mean-genes', type=float, default=25.0, help="Average genes per isolate")
+    parser.add_argument('--genome-length', type=int, default=5000, help="Bases per synthetic genome")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generate(args.workdir, args.isolates, args.genes, args.classes, args.mean_genes, args.genome_length, args.seed)
+    print(f"Synthetic workspace written to {args.workdir}")
+
+
+if __name__ == '__main__':
+    main()
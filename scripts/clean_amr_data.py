@@ -1,27 +1,10 @@
-import pandas as pd
+"""Runs ``amr-dataset encode``; the code lives in amr_dataset/clean_amr_data.py."""
+import os
+import sys
 
-# Load the dataset
-df = pd.read_csv('amr_summary_dataset.csv')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Fill missing values in AMR columns with empty strings
-df['AMR_Gene_Profile'] = df['AMR_Gene_Profile'].fillna('')
-df['Drug_Resistance_Phenotype'] = df['Drug_Resistance_Phenotype'].fillna('')
+from amr_dataset.clean_amr_data import main
 
-# One-hot encode AMR_Gene_Profile
-genes_dummies = df['AMR_Gene_Profile'].str.get_dummies(sep=';')
-
-# One-hot encode Drug_Resistance_Phenotype
-phenotypes_dummies = df['Drug_Resistance_Phenotype'].str.get_dummies(sep=';')
-
-# Concatenate the dummies with the original DataFrame
-df_cleaned = pd.concat([df, genes_dummies, phenotypes_dummies], axis=1)
-
-# Drop the original AMR columns
-df_cleaned = df_cleaned.drop(columns=['AMR_Gene_Profile', 'Drug_Resistance_Phenotype'])
-
-# Save the cleaned dataset
-df_cleaned.to_csv('amr_summary_cleaned.csv', index=False)
-
-# Print confirmation and dimensions
-print(f"Cleaned dataset saved to amr_summary_cleaned.csv")
-print(f"Dataset dimensions: {df_cleaned.shape[0]} rows, {df_cleaned.shape[1]} columns")
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""Runs ``amr-dataset delta``; the code lives in amr_dataset/release_delta.py."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amr_dataset.release_delta import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Regression tests for ``amr-dataset delta`` (amr_dataset/release_delta.py)."""
+import pandas as pd
+import pytest
+
+from amr_dataset.release_delta import apply_delta, diff_releases
+
+
+def release(ids, country='USA'):
+    n = len(ids)
+    return pd.DataFrame({
+        'Isolate_ID': ids,
+        'country': [country] * n,
+        'gene_blaTEM-1': [i % 2 for i in range(n)],
+        'class_beta-lactam': [1] * n,
+    })
+
+
+def round_trip(tmp_path, old, new, chunksize):
+    old_path, new_path, output = tmp_path / 'old.csv', tmp_path / 'new.csv', tmp_path / 'rebuilt.csv'
+    old.to_csv(old_path, index=False)
+    new.to_csv(new_path, index=False)
+    diff_releases(str(old_path), str(new_path), str(tmp_path / 'delta'), chunksize=chunksize)
+    apply_delta(str(old_path), str(tmp_path / 'delta'), str(output), chunksize=chunksize)
+    return output.read_bytes(), new_path.read_bytes()
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 4, 5])
+def test_apply_rows_inserted_into_a_deleted_chunk(tmp_path, chunksize):
+    # The whole first chunk is deleted and new isolates take its place, while
+    # a column is added: the added flags must not come back as floats
+    old = release([f'ISO{i:02d}' for i in range(12)])
+    new = pd.concat([release(['NEW01', 'NEW02'], country='UK'), old.iloc[5:]], ignore_index=True)
+    new['gene_mcr-1'] = [int(i % 3 == 0) for i in range(len(new))]
+    rebuilt, expected = round_trip(tmp_path, old, new, chunksize)
+    assert rebuilt == expected
+
+
+@pytest.mark.parametrize('old_ids, new_ids', [([], ['A', 'B']), (['A', 'B'], [])])
+def test_apply_empty_release(tmp_path, old_ids, new_ids):
+    rebuilt, expected = round_trip(tmp_path, release(old_ids), release(new_ids), chunksize=2)
+    assert rebuilt == expected